@@ -4,29 +4,41 @@ Flask Backend API Server
 Almora Forest Fire Prediction System
 """
 
+import time
+_import_started = time.perf_counter()
+
 import os
+import gc
 import json
+import threading
+import importlib.util
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, Response, render_template, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
-import folium
-from folium.plugins import HeatMap, MarkerCluster
 import warnings
 warnings.filterwarnings('ignore')
 
-# TensorFlow import with error handling
 try:
-    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
-    import tensorflow as tf
-    tf.get_logger().setLevel('ERROR')
-    TENSORFLOW_AVAILABLE = True
+    import orjson
 except ImportError:
-    TENSORFLOW_AVAILABLE = False
+    orjson = None
+
+# TensorFlow itself is only imported when the model is loaded (see load_model)
+TENSORFLOW_AVAILABLE = importlib.util.find_spec('tensorflow') is not None
+if not TENSORFLOW_AVAILABLE:
     print("Warning: TensorFlow not available")
 
-from cellular_automata import CellularAutomataFire, SimulationParams
+from satellite_cube import load_cube
+from inference import InferenceService, find_model_path, load_trained_model, model_version
+from risk_archive import load_archive
+from cache import LRUCache
+from tiles import HeatmapTiles
+from fire_store import FireRecordStore, records_frame, parse_bbox, serialize_records, heatmap_points
+from cellular_automata import (CellularAutomataFire, SimulationParams, ENGINES, ENGINE_VECTORIZED,
+                               run_ensemble, stop_at_area, stop_at_cell)
+from simulation_jobs import SimulationJobQueue, QueueFullError, JOB_COMPLETED, SIMULATION_JOB_DB
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 
@@ -34,7 +46,7 @@ app = Flask(__name__, static_folder='static', template_folder='templates')
 CORS(app, resources={
     r"/api/*": {
         "origins": ["http://localhost:3000", "http://127.0.0.1:3000"],
-        "methods": ["GET", "POST", "OPTIONS"],
+        "methods": ["GET", "POST", "DELETE", "OPTIONS"],
         "allow_headers": ["Content-Type"]
     }
 })
@@ -49,49 +61,112 @@ ALMORA_BOUNDS = {
     'west': 79.35
 }
 
+MAX_ENSEMBLE_RUNS = 5000
+MAX_PREDICT_RANGE_DAYS = 366
+MAX_HISTORICAL_PAGE = 5000
+MAX_HEATMAP_PAGE = 20000
+DEFAULT_MAP_MARKERS = 100
+MAX_MAP_MARKERS = 1000
+MAX_QUEUED_SIMULATIONS = 16
+MAX_JOB_WAIT = 30  # Seconds a job poll may block for progress
+
+# When a worker loads the model: 'background' (thread at startup), 'eager'
+# (before serving) or 'lazy' (on the first prediction request)
+MODEL_WARMUP = os.environ.get('MODEL_WARMUP', 'background')
+
 # Global variables
 model = None
-fire_data = None
+fire_records = None
+heatmap_tiles = LRUCache(8)  # Tile pyramids per data version and date range
+folium_cache = LRUCache(16)
 training_stats = None
+satellite_cube = None
+inference_service = None
+risk_archive = None
+simulation_jobs = SimulationJobQueue(workers=int(os.environ.get('SIMULATION_WORKERS', 2)),
+                                     max_queued=MAX_QUEUED_SIMULATIONS,
+                                     db_path=os.environ.get('SIMULATION_JOB_DB', SIMULATION_JOB_DB))
+data_ready = False     # Shared data preloaded
+worker_ready = False   # Per-process setup done
+model_lock = threading.Lock()
+worker_lock = threading.Lock()
+model_status = 'unloaded'  # unloaded, loading, loaded, unavailable or failed
+startup_timings = {}       # Seconds spent importing, preloading and loading the model
 
 def load_model():
-    """Load the trained CNN-LSTM model"""
-    global model
-    if not TENSORFLOW_AVAILABLE:
-        return None
-
-    model_path = 'models/almora_fire_model.keras'
-    if os.path.exists(model_path):
-        try:
-            model = tf.keras.models.load_model(model_path)
-            print(f"Model loaded from {model_path}")
+    """Load the trained CNN-LSTM model, importing TensorFlow; runs once per process"""
+    global model, inference_service, model_status
+    with model_lock:
+        if model_status not in ('unloaded', 'loading'):
             return model
-        except Exception as e:
-            print(f"Error loading model: {e}")
+        if not TENSORFLOW_AVAILABLE or find_model_path() is None:
+            model_status = 'unavailable'
+            return None
 
-    # Try .h5 format
-    model_path_h5 = 'models/almora_fire_model.h5'
-    if os.path.exists(model_path_h5):
+        model_status = 'loading'
+        started = time.perf_counter()
         try:
-            model = tf.keras.models.load_model(model_path_h5)
-            print(f"Model loaded from {model_path_h5}")
-            return model
+            loaded, model_path = load_trained_model()
+            if loaded is None:
+                model_status = 'failed'
+                return None
+
+            service = InferenceService(loaded, model_version(model_path),
+                                       load_satellite_day, cube=satellite_cube)
+            service.warm_up()
         except Exception as e:
             print(f"Error loading model: {e}")
-
-    return None
+            model_status = 'failed'
+            return None
+
+        model, inference_service = loaded, service
+        model_status = 'loaded'
+        startup_timings['model_load'] = round(time.perf_counter() - started, 3)
+        print(f"Model loaded from {model_path} in {startup_timings['model_load']:.1f}s")
+        return model
+
+def get_inference_service():
+    """Inference service, loading the model (or waiting for the warm-up) on first use"""
+    if model_status in ('unloaded', 'loading'):
+        load_model()
+    return inference_service
+
+def expected_model_version():
+    """Version of the model this process serves, found without loading it"""
+    if inference_service is not None:
+        return inference_service.version
+    if model_status in ('unavailable', 'failed') or not TENSORFLOW_AVAILABLE:
+        return None
+    model_path = find_model_path()
+    return model_version(model_path) if model_path else None
+
+def load_risk_archive():
+    """Open the precomputed risk map archive if it has been built"""
+    global risk_archive
+    risk_archive = load_archive()
+    if risk_archive is not None:
+        print(f"Risk archive loaded ({len(risk_archive)} days, {risk_archive.model_version})")
+    return risk_archive
+
+def archived_risk_map(date_str: str):
+    """Precomputed risk map, unless the archive was built by another model"""
+    if risk_archive is None:
+        return None
+    version = expected_model_version()
+    if version is not None and risk_archive.model_version != version:
+        return None
+    return risk_archive.get(date_str)
 
 def load_fire_data():
     """Load historical fire data"""
-    global fire_data, training_stats
+    global fire_records, training_stats
 
     try:
-        fire_data = pd.read_csv('almora_fake_fire_data.csv')
-        fire_data['date'] = pd.to_datetime(fire_data['date'])
-        print(f"Loaded {len(fire_data)} fire records")
+        fire_records = FireRecordStore.from_csv()
+        print(f"Loaded {len(fire_records)} fire records")
     except Exception as e:
         print(f"Error loading fire data: {e}")
-        fire_data = pd.DataFrame()
+        fire_records = None
 
     # Load training stats
     try:
@@ -105,65 +180,316 @@ def load_fire_data():
             'epochs_trained': 10
         }
 
-def generate_fire_risk_map(date_str: str = None) -> np.ndarray:
-    """Generate fire risk map for given date"""
-    # If we have a model and satellite data, use it
-    if model and date_str:
-        try:
-            # Load 5 days of satellite data before the target date
-            target_date = datetime.strptime(date_str, '%Y-%m-%d')
-            sequence = []
+def json_response(payload: dict):
+    """JSON response, encoded with orjson when it is installed"""
+    if orjson is None:
+        return jsonify(payload)
+    return Response(orjson.dumps(payload), mimetype='application/json')
+
+def page_bounds(total: int, max_limit: int):
+    """(start, stop) rows for the ``cursor`` and ``limit`` query parameters"""
+    cursor = request.args.get('cursor', 0, type=int)
+    limit = request.args.get('limit', max_limit, type=int)
+    if cursor < 0 or not 1 <= limit <= max_limit:
+        raise ValueError(f"cursor must be >= 0 and limit between 1 and {max_limit}")
+    return min(cursor, total), min(cursor + limit, total)
+
+def page_info(start: int, stop: int, total: int) -> dict:
+    return {
+        'total': total,
+        'cursor': start,
+        'next_cursor': stop if stop < total else None
+    }
 
-            for i in range(5, 0, -1):
-                date = (target_date - timedelta(days=i)).strftime('%Y-%m-%d')
-                ndvi_path = f'satellite_images/ndvi_{date}.npy'
-                lst_path = f'satellite_images/lst_{date}.npy'
+def fire_data_available() -> bool:
+    return fire_records is not None and not fire_records.empty
+
+def spatial_filters() -> dict:
+    """FireRecordStore.query arguments for the bbox / radius query parameters"""
+    filters = {}
+    if request.args.get('bbox'):
+        filters['bbox'] = parse_bbox(request.args['bbox'])
+
+    if 'radius_km' in request.args:
+        lat = request.args.get('lat', type=float)
+        lon = request.args.get('lon', type=float)
+        radius_km = request.args.get('radius_km', type=float)
+        if lat is None or lon is None or radius_km is None or radius_km <= 0:
+            raise ValueError("radius queries need lat, lon and a positive radius_km")
+        filters['near'] = (lat, lon, radius_km)
+
+    return filters
+
+def historical_filters() -> dict:
+    """FireRecordStore.query arguments from the request's query parameters"""
+    return {
+        'start_date': request.args.get('start'),
+        'end_date': request.args.get('end'),
+        'fire_occurred': request.args.get('fire_occurred', type=int),
+        'min_confidence': request.args.get('min_confidence', type=float),
+        'max_confidence': request.args.get('max_confidence', type=float),
+        **spatial_filters()
+    }
 
-                if os.path.exists(ndvi_path) and os.path.exists(lst_path):
-                    ndvi = np.load(ndvi_path)
-                    lst = np.load(lst_path)
+def current_heatmap_tiles(start_date: str = None, end_date: str = None) -> HeatmapTiles:
+    """Tile pyramid for the current fire data in a date range, rebuilt after new records"""
+    aggregates = fire_records.aggregates
+    # A range covering all records shares the unfiltered pyramid
+    if start_date and pd.Timestamp(start_date) <= aggregates.start_date:
+        start_date = None
+    if end_date and pd.Timestamp(end_date) >= aggregates.end_date:
+        end_date = None
+
+    version = aggregates.etag
+    if start_date or end_date:
+        version = f"{version}:{start_date or ''}..{end_date or ''}"
+    return heatmap_tiles.get_or_create(version, lambda: HeatmapTiles.from_frame(
+        fire_records.query(start_date, end_date, fire_occurred=1), ALMORA_BOUNDS, version))
+
+def tile_date_range():
+    """The optional ``start`` / ``end`` query parameters as YYYY-MM-DD"""
+    return tuple(
+        pd.Timestamp(value).strftime('%Y-%m-%d') if value else None
+        for value in (request.args.get('start'), request.args.get('end'))
+    )
 
-                    # Normalize
-                    ndvi_norm = (ndvi - ndvi.min()) / (ndvi.max() - ndvi.min() + 1e-8)
-                    lst_norm = (lst - lst.min()) / (lst.max() - lst.min() + 1e-8)
+def render_folium_map(fires: pd.DataFrame, max_markers: int) -> str:
+    """Render the fire heatmap and marker cluster map to HTML"""
+    # Imported here, not at module level: folium alone takes about 0.5s to import
+    import folium
+    from folium.plugins import HeatMap, MarkerCluster
 
-                    sequence.append(np.stack([ndvi_norm, lst_norm], axis=-1))
-                else:
-                    return generate_synthetic_risk_map()
+    # Create base map
+    m = folium.Map(
+        location=[ALMORA_LAT, ALMORA_LON],
+        zoom_start=10,
+        tiles='cartodbdark_matter'
+    )
 
-            # Make prediction
-            X = np.array([sequence])
-            prediction = model.predict(X, verbose=0)
+    # Add heatmap layer
+    HeatMap(
+        heatmap_points(fires),
+        min_opacity=0.3,
+        radius=15,
+        blur=20,
+        gradient={0.4: 'yellow', 0.65: 'orange', 1: 'red'}
+    ).add_to(m)
+
+    # Add marker cluster for individual fires (fixed sample, so renders are repeatable)
+    marker_cluster = MarkerCluster(name='Fire Incidents').add_to(m)
+
+    sample = fires.sample(min(max_markers, len(fires)), random_state=0)
+    for date, lat, lon, brightness, confidence in zip(
+            sample['date'], sample['latitude'], sample['longitude'],
+            sample['brightness'], sample['confidence']):
+        folium.CircleMarker(
+            location=[lat, lon],
+            radius=5,
+            color='red',
+            fill=True,
+            popup=f"Date: {date}<br>Brightness: {brightness:.1f}<br>Confidence: {confidence:.1f}%"
+        ).add_to(marker_cluster)
 
-            # Use LST channel as fire risk (higher temp = higher risk)
-            risk_map = prediction[0, :, :, 1]
+    # Add layer control
+    folium.LayerControl().add_to(m)
 
-            # Enhance contrast
-            risk_map = (risk_map - risk_map.min()) / (risk_map.max() - risk_map.min() + 1e-8)
+    return m._repr_html_()
+
+def folium_map_html(start_date: str = None, end_date: str = None,
+                    max_markers: int = DEFAULT_MAP_MARKERS) -> str:
+    """Folium map HTML, memoized per data version and query parameters"""
+    key = (fire_records.aggregates.etag, start_date, end_date, max_markers)
+    return folium_cache.get_or_create(key, lambda: render_folium_map(
+        fire_records.query(start_date, end_date, fire_occurred=1), max_markers))
+
+def load_satellite_cube():
+    """Open the memory-mapped satellite image cube if it has been built"""
+    global satellite_cube
+    satellite_cube = load_cube()
+    if satellite_cube is not None:
+        print(f"Satellite cube loaded ({len(satellite_cube)} days)")
+    return satellite_cube
+
+def load_satellite_day(date_str: str):
+    """NDVI and LST images for a date, or None if they are not available"""
+    if satellite_cube is not None:
+        images = satellite_cube.get(date_str)
+        if images is None:
+            return None
+        return images[..., 0], images[..., 1]
+
+    ndvi_path = f'satellite_images/ndvi_{date_str}.npy'
+    lst_path = f'satellite_images/lst_{date_str}.npy'
+    if os.path.exists(ndvi_path) and os.path.exists(lst_path):
+        return np.load(ndvi_path), np.load(lst_path)
+    return None
 
+def generate_fire_risk_map(date_str: str = None) -> np.ndarray:
+    """Generate fire risk map for given date"""
+    # Precomputed maps are read straight from the archive
+    if date_str:
+        risk_map = archived_risk_map(date_str)
+        if risk_map is not None:
             return risk_map
 
+    # If we have a model and satellite data, use it
+    service = get_inference_service() if date_str else None
+    if service:
+        try:
+            # Cached by date and model version, batched with concurrent requests
+            risk_map = service.predict_risk_map(date_str)
+            if risk_map is not None:
+                return risk_map
+
         except Exception as e:
             print(f"Prediction error: {e}")
-            return generate_synthetic_risk_map()
 
     return generate_synthetic_risk_map()
 
+def risk_statistics(risk_map: np.ndarray) -> dict:
+    """Summary statistics and risk level of a risk map"""
+    avg_risk = float(np.mean(risk_map))
+    max_risk = float(np.max(risk_map))
+    high_risk_cells = int(np.sum(risk_map > 0.7))
+
+    # Risk level classification
+    if avg_risk > 0.6:
+        risk_level = 'EXTREME'
+    elif avg_risk > 0.45:
+        risk_level = 'HIGH'
+    elif avg_risk > 0.3:
+        risk_level = 'MODERATE'
+    else:
+        risk_level = 'LOW'
+
+    return {
+        'average_risk': avg_risk,
+        'max_risk': max_risk,
+        'high_risk_cells': high_risk_cells,
+        'risk_level': risk_level,
+        'risk_percentage': avg_risk * 100
+    }
+
 def generate_synthetic_risk_map() -> np.ndarray:
     """Generate synthetic risk map for visualization"""
-    np.random.seed(42)
-    risk = np.random.uniform(0.1, 0.5, (64, 64))
+    rng = np.random.default_rng(42)
+    risk = rng.uniform(0.1, 0.5, (64, 64))
 
     # Add some hotspots
     for _ in range(5):
-        cx, cy = np.random.randint(10, 54, 2)
-        radius = np.random.randint(5, 15)
+        cx, cy = rng.integers(10, 54, 2)
+        radius = rng.integers(5, 15)
         y, x = np.ogrid[:64, :64]
         mask = (x - cx)**2 + (y - cy)**2 <= radius**2
-        risk[mask] += np.random.uniform(0.3, 0.5)
+        risk[mask] += rng.uniform(0.3, 0.5)
 
     return np.clip(risk, 0, 1)
 
+def build_simulation(data: dict) -> CellularAutomataFire:
+    """Create and ignite a simulation from request parameters"""
+    engine = data.get('engine', ENGINE_VECTORIZED)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'")
+
+    params = SimulationParams(
+        grid_size=64,
+        wind_speed=float(data.get('wind_speed', 5.0)),
+        wind_direction=float(data.get('wind_direction', 45.0)),
+        temperature=float(data.get('temperature', 35.0)),
+        humidity=float(data.get('humidity', 30.0)),
+        base_spread_prob=float(data.get('spread_prob', 0.3)),
+        burn_duration=int(data.get('burn_duration', 3)),
+        time_steps=int(data.get('time_steps', 50)),
+        engine=engine,
+        seed=int(data['seed']) if data.get('seed') is not None else None
+    )
+
+    # Load satellite data if available
+    ndvi, lst = load_satellite_day('2023-05-15') or (None, None)
+
+    sim = CellularAutomataFire(params, ndvi, lst)
+
+    # Ignite based on request or random
+    ignite_points = data.get('ignite_points', [])
+    if ignite_points:
+        for point in ignite_points:
+            sim.ignite(int(point['row']), int(point['col']))
+    else:
+        sim.ignite_random(int(data.get('num_fires', 3)))
+
+    return sim
+
+def output_options(data: dict):
+    """history_format and isochrone_interval of a simulation result request"""
+    history_format = data.get('history_format', 'frames')
+    if history_format not in ('frames', 'delta', 'none'):
+        raise ValueError(f"Unknown history format '{history_format}'")
+
+    interval = data.get('isochrone_interval')
+    if interval is not None:
+        interval = int(interval)
+        if interval < 1:
+            raise ValueError("isochrone_interval must be at least 1")
+    return history_format, interval
+
+def stop_conditions(data: dict, grid_size: int) -> list:
+    """Early-stop predicates from the optional stop_area_pct / stop_at_cell parameters"""
+    conditions = []
+    if data.get('stop_area_pct') is not None:
+        conditions.append(stop_at_area(float(data['stop_area_pct'])))
+
+    cell = data.get('stop_at_cell')
+    if cell is not None:
+        row, col = int(cell['row']), int(cell['col'])
+        if not (0 <= row < grid_size and 0 <= col < grid_size):
+            raise ValueError(f"stop_at_cell must lie within the {grid_size}x{grid_size} grid")
+        conditions.append(stop_at_cell(row, col))
+    return conditions
+
+def simulation_events(sim: CellularAutomataFire, stop_when=()):
+    """Step a simulation lazily, yielding a header, per-step deltas and an end event.
+
+    Nothing is recorded on the simulation, so memory stays O(grid) however
+    many steps are streamed.
+    """
+    steps = sim.iter_steps(stop_when=stop_when, record_history=False)
+    snapshot = next(steps)
+
+    yield {
+        'type': 'header',
+        'params': {
+            'grid_size': sim.params.grid_size,
+            'wind_speed': sim.params.wind_speed,
+            'wind_direction': sim.params.wind_direction,
+            'temperature': sim.params.temperature,
+            'humidity': sim.params.humidity,
+            'time_steps': sim.params.time_steps
+        },
+        'shape': list(sim.grid.shape),
+        'initial': sim.history.initial_cells(),
+        'stats': snapshot.stats
+    }
+
+    for snapshot in steps:
+        yield {
+            'type': 'step',
+            'step': snapshot.step,
+            'ignited': snapshot.ignited.tolist(),
+            'burned_out': snapshot.burned_out.tolist(),
+            'stats': snapshot.stats
+        }
+
+    yield {
+        'type': 'end',
+        'steps': snapshot.step + 1,
+        'stop_reason': sim.stop_reason,
+        'final_stats': snapshot.stats
+    }
+
+def sse_event(event: dict) -> str:
+    """One Server-Sent Event, named after the event type"""
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
 # ==================== ROUTES ====================
 
 @app.route('/')
@@ -202,32 +528,74 @@ def predict():
     try:
         risk_map = generate_fire_risk_map(date_str)
 
-        # Calculate risk statistics
-        avg_risk = float(np.mean(risk_map))
-        max_risk = float(np.max(risk_map))
-        high_risk_cells = int(np.sum(risk_map > 0.7))
-
-        # Risk level classification
-        if avg_risk > 0.6:
-            risk_level = 'EXTREME'
-        elif avg_risk > 0.45:
-            risk_level = 'HIGH'
-        elif avg_risk > 0.3:
-            risk_level = 'MODERATE'
-        else:
-            risk_level = 'LOW'
-
         return jsonify({
             'success': True,
             'date': date_str,
             'risk_map': risk_map.tolist(),
-            'statistics': {
-                'average_risk': avg_risk,
-                'max_risk': max_risk,
-                'high_risk_cells': high_risk_cells,
-                'risk_level': risk_level,
-                'risk_percentage': avg_risk * 100
-            },
+            'statistics': risk_statistics(risk_map),
+            'bounds': ALMORA_BOUNDS,
+            'center': {'lat': ALMORA_LAT, 'lon': ALMORA_LON}
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/predict/range', methods=['POST'])
+def predict_range():
+    """Generate fire predictions for every day in a date range"""
+    data = request.get_json() or {}
+
+    try:
+        start = datetime.strptime(data['start'], '%Y-%m-%d')
+        end = datetime.strptime(data['end'], '%Y-%m-%d')
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'start and end dates (YYYY-MM-DD) are required'}), 400
+
+    num_days = (end - start).days + 1
+    if not 1 <= num_days <= MAX_PREDICT_RANGE_DAYS:
+        return jsonify({'success': False,
+                        'error': f'Date range must cover 1 to {MAX_PREDICT_RANGE_DAYS} days'}), 400
+
+    include_maps = bool(data.get('include_maps', False))
+    dates = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(num_days)]
+
+    try:
+        # Archive first, then one batched model run for the remaining days
+        risk_maps, sources = {}, {}
+        for date_str in dates:
+            risk_map = archived_risk_map(date_str)
+            if risk_map is not None:
+                risk_maps[date_str], sources[date_str] = risk_map, 'archive'
+
+        missing = [d for d in dates if d not in risk_maps]
+        service = get_inference_service() if missing else None
+        if service:
+            predicted = service.predict_range(missing[0], missing[-1])
+            for date_str in missing:
+                if date_str in predicted:
+                    risk_maps[date_str], sources[date_str] = predicted[date_str], 'model'
+
+        predictions = []
+        for date_str in dates:
+            risk_map = risk_maps.get(date_str)
+            if risk_map is None:
+                risk_map, sources[date_str] = generate_synthetic_risk_map(), 'synthetic'
+
+            entry = {
+                'date': date_str,
+                'source': sources[date_str],
+                'statistics': risk_statistics(risk_map)
+            }
+            if include_maps:
+                entry['risk_map'] = risk_map.tolist()
+            predictions.append(entry)
+
+        return jsonify({
+            'success': True,
+            'start': dates[0],
+            'end': dates[-1],
+            'count': len(predictions),
+            'predictions': predictions,
             'bounds': ALMORA_BOUNDS,
             'center': {'lat': ALMORA_LAT, 'lon': ALMORA_LON}
         })
@@ -238,36 +606,52 @@ def predict():
 @app.route('/api/historical')
 def historical():
     """Get historical fire data"""
-    if fire_data is None or fire_data.empty:
+    if not fire_data_available():
         return jsonify({'success': False, 'error': 'No data available'}), 404
 
-    # Filter by date range if provided
-    start_date = request.args.get('start')
-    end_date = request.args.get('end')
+    columnar = request.args.get('format', 'records') == 'columns'
 
-    df = fire_data.copy()
-
-    if start_date:
-        df = df[df['date'] >= start_date]
-    if end_date:
-        df = df[df['date'] <= end_date]
-
-    # Convert to list of records
-    records = []
-    for _, row in df.iterrows():
-        records.append({
-            'date': row['date'].strftime('%Y-%m-%d'),
-            'latitude': float(row['latitude']),
-            'longitude': float(row['longitude']),
-            'fire_occurred': int(row['fire_occurred']),
-            'brightness': float(row['brightness']),
-            'confidence': float(row['confidence'])
-        })
+    # Date range and bbox / radius are index lookups; other filters apply within them
+    try:
+        df = fire_records.query(**historical_filters())
+        start, stop = page_bounds(len(df), MAX_HISTORICAL_PAGE)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    page = df.iloc[start:stop]
+
+    return json_response({
+        'success': True,
+        'count': len(page),
+        'format': 'columns' if columnar else 'records',
+        'data': serialize_records(page, columnar),
+        **page_info(start, stop, len(df))
+    })
+
+@app.route('/api/historical', methods=['POST'])
+def add_historical():
+    """Append new fire records"""
+    if fire_records is None:
+        return jsonify({'success': False, 'error': 'No data available'}), 404
+
+    # Appends are held in memory, so other server processes would never see them
+    if request.environ.get('wsgi.multiprocess'):
+        return jsonify({
+            'success': False,
+            'error': 'Appending records needs a single server process (WEB_CONCURRENCY=1)'
+        }), 409
+
+    data = request.get_json(silent=True) or {}
+    try:
+        added = fire_records.append(records_frame(data.get('records')))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
     return jsonify({
         'success': True,
-        'count': len(records),
-        'data': records
+        'added': added,
+        'total_records': len(fire_records),
+        'version': fire_records.aggregates.etag
     })
 
 @app.route('/api/simulation', methods=['POST'])
@@ -275,190 +659,247 @@ def run_simulation():
     """Run cellular automata fire spread simulation"""
     data = request.get_json() or {}
 
-    params = SimulationParams(
-        grid_size=64,
-        wind_speed=float(data.get('wind_speed', 5.0)),
-        wind_direction=float(data.get('wind_direction', 45.0)),
-        temperature=float(data.get('temperature', 35.0)),
-        humidity=float(data.get('humidity', 30.0)),
-        base_spread_prob=float(data.get('spread_prob', 0.3)),
-        burn_duration=int(data.get('burn_duration', 3)),
-        time_steps=int(data.get('time_steps', 50))
-    )
-
-    # Load satellite data if available
     try:
-        ndvi = np.load('satellite_images/ndvi_2023-05-15.npy')
-        lst = np.load('satellite_images/lst_2023-05-15.npy')
-    except:
-        ndvi = None
-        lst = None
-
-    # Create and run simulation
-    sim = CellularAutomataFire(params, ndvi, lst)
-
-    # Ignite based on request or random
-    ignite_points = data.get('ignite_points', [])
-    if ignite_points:
-        for point in ignite_points:
-            sim.ignite(int(point['row']), int(point['col']))
-    else:
-        sim.ignite_random(int(data.get('num_fires', 3)))
+        history_format, isochrone_interval = output_options(data)
+        sim = build_simulation(data)
+        stop_when = stop_conditions(data, sim.grid_size)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
     # Run simulation
-    sim.run()
+    sim.run(stop_when=stop_when)
 
     return jsonify({
         'success': True,
-        'simulation': sim.get_simulation_data()
+        'simulation': sim.get_simulation_data(history_format, isochrone_interval)
     })
 
-@app.route('/api/analytics')
-def get_analytics():
-    """Get analytics data for dashboard"""
-    if fire_data is None or fire_data.empty:
-        return jsonify({'success': False, 'error': 'No data available'}), 404
+@app.route('/api/simulation/stream', methods=['POST'])
+def stream_simulation():
+    """Run a simulation and stream it as NDJSON, one line per step"""
+    data = request.get_json() or {}
+
+    try:
+        sim = build_simulation(data)
+        stop_when = stop_conditions(data, sim.grid_size)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
-    df = fire_data.copy()
+    def generate():
+        for event in simulation_events(sim, stop_when):
+            yield json.dumps(event, separators=(',', ':')) + '\n'
 
-    # Monthly fire distribution
-    df['month'] = df['date'].dt.month
-    df['year'] = df['date'].dt.year
-    monthly_fires = df[df['fire_occurred'] == 1].groupby('month').size().to_dict()
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
 
-    # Fill missing months
-    monthly_data = [monthly_fires.get(m, 0) for m in range(1, 13)]
+@app.route('/api/simulation/events')
+def simulation_event_stream():
+    """Run a simulation and push each step as a Server-Sent Event (for EventSource)"""
+    data = request.args.to_dict()
 
-    # Yearly trend
-    yearly_fires = df[df['fire_occurred'] == 1].groupby('year').size().to_dict()
+    try:
+        for name in ('ignite_points', 'stop_at_cell'):
+            if name in data:
+                data[name] = json.loads(data[name])
+        sim = build_simulation(data)
+        stop_when = stop_conditions(data, sim.grid_size)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    def generate():
+        for event in simulation_events(sim, stop_when):
+            yield sse_event(event)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
+
+@app.route('/api/simulation/jobs', methods=['POST'])
+def submit_simulation_job():
+    """Queue a simulation and return its job id without waiting for it"""
+    data = request.get_json() or {}
 
-    # Geographic hotspots
-    fire_locations = df[df['fire_occurred'] == 1][['latitude', 'longitude', 'brightness']].values.tolist()
+    try:
+        history_format, isochrone_interval = output_options(data)
+        sim = build_simulation(data)
+        stop_when = stop_conditions(data, sim.grid_size)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
-    # Daily fire probability by season
-    seasons = {
-        'Winter': [12, 1, 2],
-        'Spring': [3, 4, 5],
-        'Summer': [6, 7, 8],
-        'Autumn': [9, 10, 11]
+    try:
+        job = simulation_jobs.submit(sim, history_format, stop_when, isochrone_interval)
+    except QueueFullError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503, {'Retry-After': '5'}
+
+    return jsonify({'success': True, 'job': job}), 202, {
+        'Location': f"/api/simulation/jobs/{job['id']}"
     }
 
-    seasonal_risk = {}
-    for season, months in seasons.items():
-        season_data = df[df['month'].isin(months)]
-        if len(season_data) > 0:
-            seasonal_risk[season] = float(season_data['fire_occurred'].mean() * 100)
-        else:
-            seasonal_risk[season] = 0
+@app.route('/api/simulation/jobs/<job_id>')
+def get_simulation_job(job_id):
+    """Job status and progress; the full result once it has completed"""
+    job = simulation_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown simulation job'}), 404
+
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), MAX_JOB_WAIT)
+        after_step = int(request.args.get('after_step', job['step']))
+        since = request.args.get('since', type=int)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'wait and after_step must be numbers'}), 400
+
+    # Long poll: hold the request until the job makes progress
+    if wait:
+        job = simulation_jobs.wait(job_id, after_step, wait) or job
+
+    response = {'success': True, 'job': job}
+    if since is not None:
+        response['deltas'] = simulation_jobs.deltas(job_id, since, job['step'])
+    if job['status'] == JOB_COMPLETED:
+        response['simulation'] = simulation_jobs.result(job_id)
+    return jsonify(response)
+
+@app.route('/api/simulation/jobs/<job_id>', methods=['DELETE'])
+def cancel_simulation_job(job_id):
+    """Cancel a queued or running simulation job"""
+    job = simulation_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown simulation job'}), 404
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/api/simulation/ensemble', methods=['POST'])
+def run_simulation_ensemble():
+    """Run a Monte Carlo ensemble and return per-cell burn probability"""
+    data = request.get_json() or {}
+
+    try:
+        sim = build_simulation(data)
+        n_runs = int(data.get('n_runs', 100))
+        workers = min(max(int(data.get('workers', 1)), 1), os.cpu_count() or 1)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    if not 1 <= n_runs <= MAX_ENSEMBLE_RUNS:
+        return jsonify({'success': False, 'error': f'n_runs must be between 1 and {MAX_ENSEMBLE_RUNS}'}), 400
+
+    # Realizations use child streams of the simulation's seed
+    result = run_ensemble(sim, n_runs=n_runs, workers=workers)
+
+    # Cells that never burned have no arrival time
+    arrival_quantiles = {
+        f'p{int(q * 100)}': np.where(np.isnan(arr), None, arr).tolist()
+        for q, arr in result['arrival_quantiles'].items()
+    }
 
     return jsonify({
         'success': True,
-        'total_records': len(df),
-        'total_fires': int(df['fire_occurred'].sum()),
-        'fire_rate': float(df['fire_occurred'].mean() * 100),
-        'monthly_distribution': monthly_data,
-        'yearly_trend': yearly_fires,
-        'seasonal_risk': seasonal_risk,
-        'hotspots': fire_locations[:100],  # Limit for performance
-        'training_stats': training_stats,
-        'date_range': {
-            'start': df['date'].min().strftime('%Y-%m-%d'),
-            'end': df['date'].max().strftime('%Y-%m-%d')
+        'ensemble': {
+            'n_runs': result['n_runs'],
+            'seed': sim.params.seed,
+            'grid_size': sim.grid_size,
+            'time_steps': sim.params.time_steps,
+            'burn_probability': np.round(result['burn_probability'], 4).tolist(),
+            'arrival_quantiles': arrival_quantiles,
+            'burned_area': result['burned_area'].tolist(),
+            'burned_area_stats': result['burned_area_stats']
         }
     })
 
+@app.route('/api/analytics')
+def get_analytics():
+    """Get analytics data for dashboard"""
+    if not fire_data_available():
+        return jsonify({'success': False, 'error': 'No data available'}), 404
+
+    # Aggregates are precomputed; the body is only re-encoded after new records
+    with fire_records.lock:
+        aggregates = fire_records.aggregates
+        body, etag = aggregates.payload(training_stats), aggregates.etag
+
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
 @app.route('/api/heatmap')
 def get_heatmap():
     """Get fire risk heatmap data"""
-    if fire_data is None or fire_data.empty:
+    if not fire_data_available():
         return jsonify({'success': False, 'error': 'No data available'}), 404
 
-    # Get fire locations with intensity
-    fires = fire_data[fire_data['fire_occurred'] == 1]
-
-    heatmap_data = []
-    for _, row in fires.iterrows():
-        heatmap_data.append([
-            float(row['latitude']),
-            float(row['longitude']),
-            float(row['brightness'] / 500)  # Normalize intensity
-        ])
+    # Get fire locations with intensity, limited to the requested area
+    try:
+        fires = fire_records.query(fire_occurred=1, **spatial_filters())
+        start, stop = page_bounds(len(fires), MAX_HEATMAP_PAGE)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
-    return jsonify({
+    return json_response({
         'success': True,
-        'data': heatmap_data,
+        'data': heatmap_points(fires.iloc[start:stop]),
         'center': {'lat': ALMORA_LAT, 'lon': ALMORA_LON},
-        'bounds': ALMORA_BOUNDS
+        'bounds': ALMORA_BOUNDS,
+        **page_info(start, stop, len(fires))
     })
 
-@app.route('/api/folium-map')
-def get_folium_map():
-    """Generate Folium map HTML"""
-    if fire_data is None or fire_data.empty:
+@app.route('/api/tiles/<int:z>/<int:x>/<int:y>')
+def get_tile(z, x, y):
+    """Get a pre-binned fire density PNG tile, optionally for a start / end date range"""
+    if not fire_data_available():
         return jsonify({'success': False, 'error': 'No data available'}), 404
 
-    # Create base map
-    m = folium.Map(
-        location=[ALMORA_LAT, ALMORA_LON],
-        zoom_start=10,
-        tiles='cartodbdark_matter'
-    )
-
-    # Add fire locations
-    fires = fire_data[fire_data['fire_occurred'] == 1]
+    try:
+        tiles = current_heatmap_tiles(*tile_date_range())
+    except ValueError:
+        return jsonify({'success': False, 'error': 'start and end must be dates (YYYY-MM-DD)'}), 400
 
-    heat_data = []
-    for _, row in fires.iterrows():
-        heat_data.append([row['latitude'], row['longitude'], row['brightness'] / 500])
+    if not 0 <= z <= tiles.max_zoom or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({'success': False, 'error': f'No tile {z}/{x}/{y} (max zoom {tiles.max_zoom})'}), 404
 
-    # Add heatmap layer
-    HeatMap(
-        heat_data,
-        min_opacity=0.3,
-        radius=15,
-        blur=20,
-        gradient={0.4: 'yellow', 0.65: 'orange', 1: 'red'}
-    ).add_to(m)
+    response = Response(tiles.tile(z, x, y), mimetype='image/png')
+    response.set_etag(f'{tiles.version}/{z}/{x}/{y}')
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
 
-    # Add marker cluster for individual fires
-    marker_cluster = MarkerCluster(name='Fire Incidents').add_to(m)
+@app.route('/api/folium-map')
+def get_folium_map():
+    """Generate Folium map HTML"""
+    if not fire_data_available():
+        return jsonify({'success': False, 'error': 'No data available'}), 404
 
-    for _, row in fires.sample(min(100, len(fires))).iterrows():
-        folium.CircleMarker(
-            location=[row['latitude'], row['longitude']],
-            radius=5,
-            color='red',
-            fill=True,
-            popup=f"Date: {row['date']}<br>Brightness: {row['brightness']:.1f}<br>Confidence: {row['confidence']:.1f}%"
-        ).add_to(marker_cluster)
+    start_date = request.args.get('start')
+    end_date = request.args.get('end')
+    max_markers = request.args.get('max_markers', DEFAULT_MAP_MARKERS, type=int)
+    if not 0 <= max_markers <= MAX_MAP_MARKERS:
+        return jsonify({'success': False, 'error': f'max_markers must be between 0 and {MAX_MAP_MARKERS}'}), 400
 
-    # Add layer control
-    folium.LayerControl().add_to(m)
+    try:
+        map_html = folium_map_html(start_date, end_date, max_markers)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
-    # Return map HTML
-    map_html = m._repr_html_()
     return jsonify({'success': True, 'map_html': map_html})
 
 @app.route('/api/terrain-data')
 def get_terrain_data():
     """Get terrain elevation data for 3D visualization"""
     # Generate synthetic terrain for Almora region
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
 
     size = 64
     terrain = np.zeros((size, size))
 
     # Create base terrain with some hills
     for i in range(5):
-        cx, cy = np.random.randint(10, 54, 2)
-        height = np.random.uniform(0.5, 1.0)
-        sigma = np.random.uniform(8, 15)
+        cx, cy = rng.integers(10, 54, 2)
+        height = rng.uniform(0.5, 1.0)
+        sigma = rng.uniform(8, 15)
 
         y, x = np.ogrid[:size, :size]
         terrain += height * np.exp(-((x - cx)**2 + (y - cy)**2) / (2 * sigma**2))
 
     # Add some noise
-    terrain += np.random.uniform(0, 0.1, (size, size))
+    terrain += rng.uniform(0, 0.1, (size, size))
 
     # Normalize to reasonable elevation values (1000-3000m for Almora)
     terrain = 1000 + terrain * 2000
@@ -476,13 +917,14 @@ def get_terrain_data():
 def get_weather():
     """Get current weather data (synthetic for demo)"""
     # Simulate weather data
+    rng = np.random.default_rng()
     weather = {
-        'temperature': np.random.uniform(28, 42),
-        'humidity': np.random.uniform(20, 60),
-        'wind_speed': np.random.uniform(5, 25),
-        'wind_direction': np.random.uniform(0, 360),
-        'precipitation': np.random.uniform(0, 10),
-        'fire_weather_index': np.random.uniform(40, 90)
+        'temperature': rng.uniform(28, 42),
+        'humidity': rng.uniform(20, 60),
+        'wind_speed': rng.uniform(5, 25),
+        'wind_direction': rng.uniform(0, 360),
+        'precipitation': rng.uniform(0, 10),
+        'fire_weather_index': rng.uniform(40, 90)
     }
 
     return jsonify({
@@ -501,19 +943,92 @@ def serve_static(filename):
 
 # ==================== INITIALIZATION ====================
 
+@app.route('/api/health')
+def health():
+    """Liveness check"""
+    return jsonify({'success': True, 'status': 'ok', 'pid': os.getpid()})
+
+@app.route('/api/ready')
+def ready():
+    """Readiness check: 503 until data is preloaded and the worker is set up"""
+    is_ready = data_ready and worker_ready
+    return jsonify({
+        'success': is_ready,
+        'ready': is_ready,
+        'pid': os.getpid(),
+        'model_status': model_status,
+        'timings': startup_timings,
+        'components': {
+            'fire_data': fire_data_available(),
+            'satellite_cube': satellite_cube is not None,
+            'risk_archive': risk_archive is not None,
+            'model': inference_service is not None
+        }
+    }), 200 if is_ready else 503
+
+def preload():
+    """Load the data shared by all workers; runs once, before the server forks"""
+    global data_ready
+    if data_ready:
+        return
+
+    started = time.perf_counter()
+    load_fire_data()
+    if fire_data_available():
+        current_heatmap_tiles()
+        folium_map_html()  # Warm the default map
+    load_satellite_cube()
+    load_risk_archive()
+
+    # Exclude the preloaded objects from future collections, so GC passes in
+    # forked workers do not write to their pages and un-share them
+    gc.collect()
+    gc.freeze()
+    startup_timings['preload'] = round(time.perf_counter() - started, 3)
+    data_ready = True
+
+def init_worker():
+    """Per-process setup; TensorFlow is not fork-safe, so each worker loads its own model"""
+    global worker_ready
+    with worker_lock:
+        if worker_ready:
+            return
+
+        if MODEL_WARMUP == 'eager':
+            load_model()
+        elif MODEL_WARMUP == 'background':
+            threading.Thread(target=load_model, name='model-warmup', daemon=True).start()
+        worker_ready = True
+
+@app.before_request
+def ensure_worker():
+    """Set up the serving process on its first request when no server hook did"""
+    if not worker_ready:
+        init_worker()
+
+def create_app(with_model: bool = True) -> Flask:
+    """Application factory for WSGI servers (see wsgi.py and gunicorn.conf.py)"""
+    preload()
+    if with_model:
+        init_worker()
+    return app
+
 def initialize():
     """Initialize the application"""
     print("="*60)
     print("ALMORA FOREST FIRE PREDICTION SYSTEM")
     print("="*60)
 
-    load_fire_data()
-    load_model()
+    create_app()
+    print(f"Startup: import {startup_timings['import']:.2f}s, preload {startup_timings['preload']:.2f}s"
+          f" (model: {MODEL_WARMUP})")
 
     print("\nServer ready!")
     print(f"Access the application at: http://localhost:5000")
     print("="*60)
 
+startup_timings['import'] = round(time.perf_counter() - _import_started, 3)
+
 if __name__ == '__main__':
     initialize()
     app.run(host='0.0.0.0', port=5000, debug=True)
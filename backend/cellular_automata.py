@@ -7,14 +7,21 @@ Almora Forest Fire Prediction System
 import numpy as np
 import json
 import os
-from dataclasses import dataclass
-from typing import Tuple, List, Optional
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from matplotlib.colors import ListedColormap
+import warnings
+import threading
+import multiprocessing
+from dataclasses import dataclass, replace
+from typing import Callable, Iterator, Tuple, List, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import imageio
+from PIL import Image, ImageDraw, ImageFont
+
+try:
+    import contourpy
+except ImportError:
+    contourpy = None
+    print("Warning: contourpy not available, isochrones are disabled")
 
 # Cell states
 UNBURNED = 0
@@ -22,6 +29,35 @@ BURNING = 1
 BURNED = 2
 WATER = 3  # Cannot burn
 
+# Neighbor offsets (8-connected): N, NE, E, SE, S, SW, W, NW
+NEIGHBORS = [
+    (-1, 0), (-1, 1), (0, 1), (1, 1),
+    (1, 0), (1, -1), (0, -1), (-1, -1)
+]
+
+# Step engines
+ENGINE_LOOP = 'loop'              # Reference per-cell Python loop
+ENGINE_VECTORIZED = 'vectorized'  # Whole-grid NumPy operations
+ENGINE_FRONTIER = 'frontier'      # Only the neighborhoods of burning cells
+ENGINES = (ENGINE_LOOP, ENGINE_VECTORIZED, ENGINE_FRONTIER)
+
+# Why a run ended
+STOP_TIME_LIMIT = 'time_steps'    # Ran for all time steps
+STOP_BURNED_OUT = 'burned_out'    # No burning cells left
+STOP_CONDITION = 'stop_condition' # A stop predicate matched
+
+# Ignition / burnout steps are stored as int16
+MAX_TIME_STEPS = int(np.iinfo(np.int16).max)
+ISOCHRONE_COUNT = 5  # Default number of isochrones when no interval is given
+
+# RGB color per cell state: Forest, Fire, Burned, Water
+STATE_PALETTE = np.array([
+    [0x22, 0x8B, 0x22],
+    [0xFF, 0x45, 0x00],
+    [0x1a, 0x1a, 0x1a],
+    [0x41, 0x69, 0xE1],
+], dtype=np.uint8)
+
 @dataclass
 class SimulationParams:
     """Parameters for fire spread simulation"""
@@ -33,41 +69,282 @@ class SimulationParams:
     base_spread_prob: float = 0.3
     burn_duration: int = 3  # time steps to burn
     time_steps: int = 50
+    engine: str = ENGINE_LOOP  # 'loop', 'vectorized' or 'frontier'
+    seed: Optional[int] = None  # Seed for the simulation's own random stream
+
+@dataclass
+class StepSnapshot:
+    """One step of a run: the cells that changed and the stats after it"""
+    step: int
+    ignited: np.ndarray     # Flat indices of cells that caught fire
+    burned_out: np.ndarray  # Flat indices of cells that finished burning
+    stats: dict
+
+# Called after every step; returning True ends the run
+StopPredicate = Callable[['CellularAutomataFire', StepSnapshot], bool]
+
+def stop_at_area(pct: float) -> StopPredicate:
+    """Stop once burning and burned cells cover ``pct`` % of the grid"""
+    return lambda sim, snapshot: snapshot.stats['affected_pct'] >= pct
+
+def stop_at_cell(row: int, col: int) -> StopPredicate:
+    """Stop once the fire reaches cell (row, col)"""
+    return lambda sim, snapshot: sim.grid[row, col] in (BURNING, BURNED)
+
+def shift_mask(mask: np.ndarray, dr: int, dc: int) -> np.ndarray:
+    """Shift a boolean mask by (dr, dc) over its last two axes, padding with False.
+
+    ``out[..., r, c] == mask[..., r - dr, c - dc]`` so a burning mask shifted
+    by a neighbor offset marks the cells that offset points at.
+    """
+    out = np.zeros_like(mask)
+    rows, cols = mask.shape[-2:]
+    src_r = slice(max(-dr, 0), rows - max(dr, 0))
+    dst_r = slice(max(dr, 0), rows - max(-dr, 0))
+    src_c = slice(max(-dc, 0), cols - max(dc, 0))
+    dst_c = slice(max(dc, 0), cols - max(-dc, 0))
+    out[..., dst_r, dst_c] = mask[..., src_r, src_c]
+    return out
+
+class SimulationHistory:
+    """Delta-encoded grid history.
+
+    Keeps the initial ``uint8`` grid plus, for every step, the flat indices of
+    the cells that ignited and the cells that burned out. Any frame can be
+    rebuilt on demand; sequential access only replays the new deltas.
+    """
+
+    def __init__(self, initial: np.ndarray):
+        self.shape = initial.shape
+        self.initial = initial.astype(np.uint8)
+        self.ignited: List[np.ndarray] = []
+        self.burned_out: List[np.ndarray] = []
+
+        # Last rebuilt frame, so in-order access is incremental
+        self._cached_step = 0
+        self._cached_frame = self.initial.copy()
+
+    def append(self, ignited: np.ndarray, burned_out: np.ndarray):
+        """Record the cells that changed state during one step"""
+        self.ignited.append(np.asarray(ignited, dtype=np.int32))
+        self.burned_out.append(np.asarray(burned_out, dtype=np.int32))
+
+    def __len__(self) -> int:
+        return len(self.ignited) + 1
+
+    def frame(self, step: int) -> np.ndarray:
+        """Rebuild the grid as it was after ``step`` steps"""
+        if step < 0:
+            step += len(self)
+        if not 0 <= step < len(self):
+            raise IndexError(f"step {step} out of range for {len(self)} frames")
+
+        if step < self._cached_step:
+            self._cached_step = 0
+            self._cached_frame = self.initial.copy()
+
+        flat = self._cached_frame.reshape(-1)
+        for t in range(self._cached_step, step):
+            flat[self.burned_out[t]] = BURNED
+            flat[self.ignited[t]] = BURNING
+        self._cached_step = step
+
+        return self._cached_frame.copy()
+
+    def __getitem__(self, step: int) -> np.ndarray:
+        return self.frame(step)
+
+    def __iter__(self):
+        for step in range(len(self)):
+            yield self.frame(step)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the encoded history"""
+        return (self.initial.nbytes
+                + sum(a.nbytes for a in self.ignited)
+                + sum(a.nbytes for a in self.burned_out))
+
+    def initial_cells(self) -> dict:
+        """Flat indices of the initially non-forest cells, keyed by state"""
+        flat = self.initial.reshape(-1)
+        return {
+            str(state): np.flatnonzero(flat == state).tolist()
+            for state in (BURNING, BURNED, WATER)
+            if np.any(flat == state)
+        }
+
+    def to_dict(self) -> dict:
+        """Compact JSON form: initial non-forest cells plus per-step deltas"""
+        return {
+            'encoding': 'delta',
+            'shape': list(self.shape),
+            'initial': self.initial_cells(),
+            'ignited': [a.tolist() for a in self.ignited],
+            'burned_out': [a.tolist() for a in self.burned_out]
+        }
+
+class FrameRenderer:
+    """Renders uint8 state grids to RGB frames with a palette lookup.
+
+    Background, margins and the wind arrow are drawn once into a cached
+    template; each frame only fills in the upsampled grid and its text.
+    """
+
+    BACKGROUND = (255, 255, 255)
+    HEADER = 40
+    FOOTER = 36
+    PAD = 16
+
+    def __init__(self, grid_size: int, wind_direction: float, cell_px: Optional[int] = None):
+        self.grid_size = grid_size
+        self.scale = cell_px or max(1, 512 // grid_size)
+        self.side = grid_size * self.scale
+
+        # Canvas dimensions rounded up to a multiple of 16 for video codecs
+        width = -(-(self.side + 2 * self.PAD) // 16) * 16
+        height = -(-(self.side + self.HEADER + self.FOOTER) // 16) * 16
+        self.width, self.height = width, height
+        self.x0 = (width - self.side) // 2
+        self.y0 = self.HEADER
+
+        self.font = self._load_font(14)
+        self.small_font = self._load_font(11)
+
+        self._template = np.empty((height, width, 3), dtype=np.uint8)
+        self._template[...] = self.BACKGROUND
+        self._overlay, self._overlay_mask = self._build_wind_overlay(wind_direction)
+
+    @staticmethod
+    def _load_font(size: int):
+        try:
+            return ImageFont.load_default(size=size)
+        except TypeError:  # Pillow < 10.1 has a single bitmap size
+            return ImageFont.load_default()
+
+    def _build_wind_overlay(self, wind_direction: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Draw the wind arrow and label once on a transparent layer"""
+        layer = Image.new('RGBA', (self.side, self.side), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+
+        wind_rad = np.radians(wind_direction)
+        length = 0.08 * self.side
+        x0, y0 = 0.9 * self.side, 0.1 * self.side
+        x1 = x0 + length * np.sin(wind_rad)
+        # Points downwind like the original figure: a northerly (0 deg) wind
+        # points down the image, away from the label
+        y1 = y0 + length * np.cos(wind_rad)
+        draw.line([(x0, y0), (x1, y1)], fill='white', width=2)
+
+        # Arrow head
+        head = max(4.0, 0.3 * length)
+        for side in (-1, 1):
+            angle = wind_rad + side * np.radians(25)
+            draw.line([(x1, y1), (x1 - head * np.sin(angle), y1 - head * np.cos(angle))],
+                      fill='white', width=2)
+
+        self._draw_centered(draw, (x0, 0.04 * self.side), 'Wind', 'white', self.small_font)
+
+        rgba = np.asarray(layer)
+        return rgba[:, :, :3].copy(), rgba[:, :, 3] > 0
+
+    @staticmethod
+    def _draw_centered(draw, center, text, fill, font):
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        draw.text((center[0] - (right - left) / 2 - left, center[1] - (bottom - top) / 2 - top),
+                  text, fill=fill, font=font)
+
+    def render(self, grid: np.ndarray, step: int, stats: dict) -> np.ndarray:
+        """Render one state grid to an (height, width, 3) uint8 frame"""
+        frame = self._template.copy()
+
+        cells = STATE_PALETTE[grid]
+        if self.scale > 1:
+            cells = cells.repeat(self.scale, axis=0).repeat(self.scale, axis=1)
+        area = frame[self.y0:self.y0 + self.side, self.x0:self.x0 + self.side]
+        area[...] = cells
+        area[self._overlay_mask] = self._overlay[self._overlay_mask]
+
+        image = Image.fromarray(frame)
+        draw = ImageDraw.Draw(image)
+        self._draw_centered(draw, (self.width / 2, self.HEADER / 2),
+                            f'Fire Spread Simulation - Step {step}', 'black', self.font)
+        stats_text = f"Burning: {stats['burning_pct']:.1f}% | Burned: {stats['burned_pct']:.1f}%"
+        self._draw_centered(draw, (self.width / 2, self.y0 + self.side + self.FOOTER / 2),
+                            stats_text, '#ff6b6b', self.font)
+
+        return np.asarray(image)
 
 class CellularAutomataFire:
     """Cellular Automata-based forest fire spread simulator"""
 
     def __init__(self, params: SimulationParams, ndvi: Optional[np.ndarray] = None,
-                 lst: Optional[np.ndarray] = None):
+                 lst: Optional[np.ndarray] = None,
+                 seed_seq: Optional[np.random.SeedSequence] = None,
+                 record_history: bool = True):
+        if params.engine not in ENGINES:
+            raise ValueError(f"Unknown simulation engine: {params.engine}")
+        if params.time_steps > MAX_TIME_STEPS:
+            raise ValueError(f"time_steps must be at most {MAX_TIME_STEPS}")
+
         self.params = params
         self.grid_size = params.grid_size
 
+        # Independent random stream, never the global np.random state
+        self.seed_seq = seed_seq if seed_seq is not None else np.random.SeedSequence(params.seed)
+        self.rng = np.random.default_rng(self.seed_seq)
+
         # Initialize grid
-        self.grid = np.zeros((self.grid_size, self.grid_size), dtype=np.int32)
+        self.grid = np.zeros((self.grid_size, self.grid_size), dtype=np.uint8)
+        self._count_states()
         self.burn_time = np.zeros((self.grid_size, self.grid_size), dtype=np.int32)
 
+        # Step at which each cell caught fire / burned out (-1: not yet),
+        # counted from the last reset_history()
+        self.step_count = 0
+        self.ignition_step = np.full((self.grid_size, self.grid_size), -1, dtype=np.int16)
+        self.burnout_step = np.full((self.grid_size, self.grid_size), -1, dtype=np.int16)
+
         # Vegetation density from NDVI (affects spread probability)
         if ndvi is not None:
             self.vegetation = np.clip(ndvi, 0, 1)
         else:
-            self.vegetation = np.random.uniform(0.3, 0.9, (self.grid_size, self.grid_size))
+            self.vegetation = self.rng.uniform(0.3, 0.9, (self.grid_size, self.grid_size))
 
         # Temperature from LST (affects spread probability)
         if lst is not None:
             self.temperature_map = lst
         else:
-            self.temperature_map = np.random.uniform(25, 45, (self.grid_size, self.grid_size))
+            self.temperature_map = self.rng.uniform(25, 45, (self.grid_size, self.grid_size))
 
         # Normalize temperature to [0, 1] for probability calculation
         temp_min, temp_max = self.temperature_map.min(), self.temperature_map.max()
         self.temp_norm = (self.temperature_map - temp_min) / (temp_max - temp_min + 1e-8)
 
+        # Fuel factor (vegetation and temperature) is fixed for the whole run
+        self.fuel_factor = (self.params.base_spread_prob
+                            * (0.5 + self.vegetation)
+                            * (0.7 + 0.6 * self.temp_norm))
+
         # Calculate wind effect matrix
+        self.static_factor = self._build_static_factor()
         self.wind_effect = self._calculate_wind_effect()
 
-        # History for animation
-        self.history = []
+        # Per-direction spread probability tensor (8, grid, grid)
+        self.spread_prob = self._build_spread_probability()
+
+        # Flat indices of burning cells, rebuilt lazily (frontier engine)
+        self._frontier = None
+
+        # Cells ignited by hand since the last step (recorded with its delta)
+        self._pending_ignitions = []
+
+        # History for animation; streaming callers can switch recording off
+        # and use the deltas returned by step() instead
+        self.record_history = record_history
+        self.history = SimulationHistory(self.grid)
         self.stats_history = []
+        self.stop_reason = None
 
     def _calculate_wind_effect(self) -> np.ndarray:
         """Calculate wind influence on fire spread for 8 neighbors"""
@@ -102,17 +379,32 @@ class CellularAutomataFire:
 
         return wind_effect
 
+    def spawn_seeds(self, n: int) -> List[np.random.SeedSequence]:
+        """Independent child seed sequences, e.g. for parallel workers"""
+        return self.seed_seq.spawn(n)
+
+    def spawn_rngs(self, n: int) -> List[np.random.Generator]:
+        """Independent child generators derived from this simulation's seed"""
+        return [np.random.default_rng(s) for s in self.spawn_seeds(n)]
+
     def ignite(self, row: int, col: int):
         """Start a fire at specified location"""
         if 0 <= row < self.grid_size and 0 <= col < self.grid_size:
+            previous = self.grid[row, col]
+            if previous != BURNING:
+                self.state_counts[previous] -= 1
+                self.state_counts[BURNING] += 1
+
             self.grid[row, col] = BURNING
             self.burn_time[row, col] = self.params.burn_duration
+            self._frontier = None
+            self._pending_ignitions.append(row * self.grid_size + col)
 
     def ignite_random(self, num_points: int = 1):
         """Start fires at random locations"""
         for _ in range(num_points):
-            row = np.random.randint(self.grid_size // 4, 3 * self.grid_size // 4)
-            col = np.random.randint(self.grid_size // 4, 3 * self.grid_size // 4)
+            row = self.rng.integers(self.grid_size // 4, 3 * self.grid_size // 4)
+            col = self.rng.integers(self.grid_size // 4, 3 * self.grid_size // 4)
             self.ignite(row, col)
 
     def ignite_from_prediction(self, fire_risk_map: np.ndarray, threshold: float = 0.7):
@@ -120,43 +412,90 @@ class CellularAutomataFire:
         hot_spots = np.where(fire_risk_map > threshold)
         if len(hot_spots[0]) > 0:
             # Select a few random high-risk points
-            idx = np.random.choice(len(hot_spots[0]), min(3, len(hot_spots[0])), replace=False)
+            idx = self.rng.choice(len(hot_spots[0]), min(3, len(hot_spots[0])), replace=False)
             for i in idx:
                 self.ignite(hot_spots[0][i], hot_spots[1][i])
 
+    def _build_static_factor(self) -> np.ndarray:
+        """Everything but wind: fuel factor scaled by humidity"""
+        # Humidity effect (lower humidity = higher spread)
+        humidity_factor = 1.0 - (self.params.humidity / 100.0)
+        return self.fuel_factor * (0.5 + humidity_factor)
+
+    def _build_spread_probability(self) -> np.ndarray:
+        """Combine static and wind factors into the (8, grid, grid) tensor"""
+        # Wind effect per direction
+        prob = self.static_factor[np.newaxis, :, :] * self.wind_effect[:, np.newaxis, np.newaxis]
+
+        return np.minimum(prob, 0.95).astype(np.float32)  # Cap at 95%
+
+    def set_weather(self, wind_speed: Optional[float] = None,
+                    wind_direction: Optional[float] = None,
+                    humidity: Optional[float] = None):
+        """Change weather mid-run, rebuilding only the affected spread factors"""
+        changes = {}
+        if wind_speed is not None and wind_speed != self.params.wind_speed:
+            changes['wind_speed'] = wind_speed
+        if wind_direction is not None and wind_direction != self.params.wind_direction:
+            changes['wind_direction'] = wind_direction
+        if humidity is not None and humidity != self.params.humidity:
+            changes['humidity'] = humidity
+        if not changes:
+            return
+
+        self.params = replace(self.params, **changes)
+        if 'humidity' in changes:
+            self.static_factor = self._build_static_factor()
+        if 'wind_speed' in changes or 'wind_direction' in changes:
+            self.wind_effect = self._calculate_wind_effect()
+        self.spread_prob = self._build_spread_probability()
+
     def _get_spread_probability(self, row: int, col: int, neighbor_idx: int) -> float:
         """Calculate probability of fire spreading to a cell"""
-        # Base probability
-        prob = self.params.base_spread_prob
+        return float(self.spread_prob[neighbor_idx, row, col])
+
+    def step(self, record_history: Optional[bool] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance simulation by one time step; returns the flat indices that ignited and burned out.
+
+        ``record_history`` overrides the instance setting for this step only.
+        """
+        if record_history is None:
+            record_history = self.record_history
+        if self.params.engine == ENGINE_VECTORIZED:
+            ignited, burned_out = self._step_vectorized()
+        elif self.params.engine == ENGINE_FRONTIER:
+            ignited, burned_out = self._step_frontier()
+        else:
+            ignited, burned_out = self._step_loop()
 
-        # Vegetation effect (more vegetation = higher spread)
-        vegetation_factor = self.vegetation[row, col]
-        prob *= (0.5 + vegetation_factor)
+        # Engines only ignite unburned cells and burn out burning ones
+        self.state_counts[UNBURNED] -= ignited.size
+        self.state_counts[BURNING] += ignited.size - burned_out.size
+        self.state_counts[BURNED] += burned_out.size
 
-        # Temperature effect (higher temp = higher spread)
-        temp_factor = self.temp_norm[row, col]
-        prob *= (0.7 + 0.6 * temp_factor)
+        if self._pending_ignitions:
+            pending = np.setdiff1d(self._pending_ignitions, burned_out)
+            ignited = np.union1d(ignited, pending)
+            self._pending_ignitions = []
 
-        # Humidity effect (lower humidity = higher spread)
-        humidity_factor = 1.0 - (self.params.humidity / 100.0)
-        prob *= (0.5 + humidity_factor)
+        # Arrival times, kept whether or not history is recorded
+        self.step_count += 1
+        self.burnout_step.reshape(-1)[burned_out] = self.step_count
+        self.ignition_step.reshape(-1)[ignited] = self.step_count
+        self.burnout_step.reshape(-1)[ignited] = -1  # Re-ignited by hand
 
-        # Wind effect
-        prob *= self.wind_effect[neighbor_idx]
+        # Record state
+        if record_history:
+            self.history.append(ignited, burned_out)
+            self.stats_history.append(self.get_stats())
 
-        return min(prob, 0.95)  # Cap at 95%
+        return ignited, burned_out
 
-    def step(self):
-        """Advance simulation by one time step"""
+    def _step_loop(self):
+        """Reference engine: visit every cell in Python"""
         new_grid = self.grid.copy()
         new_burn_time = self.burn_time.copy()
 
-        # Neighbor offsets (8-connected)
-        neighbors = [
-            (-1, 0), (-1, 1), (0, 1), (1, 1),
-            (1, 0), (1, -1), (0, -1), (-1, -1)
-        ]
-
         # Process each cell
         for row in range(self.grid_size):
             for col in range(self.grid_size):
@@ -167,28 +506,106 @@ class CellularAutomataFire:
                         new_grid[row, col] = BURNED
 
                     # Try to spread to neighbors
-                    for n_idx, (dr, dc) in enumerate(neighbors):
+                    for n_idx, (dr, dc) in enumerate(NEIGHBORS):
                         nr, nc = row + dr, col + dc
                         if 0 <= nr < self.grid_size and 0 <= nc < self.grid_size:
                             if self.grid[nr, nc] == UNBURNED:
                                 spread_prob = self._get_spread_probability(nr, nc, n_idx)
-                                if np.random.random() < spread_prob:
+                                if self.rng.random() < spread_prob:
                                     new_grid[nr, nc] = BURNING
                                     new_burn_time[nr, nc] = self.params.burn_duration
 
+        changed = np.flatnonzero(new_grid != self.grid)
+        new_states = new_grid.reshape(-1)[changed]
+
         self.grid = new_grid
         self.burn_time = new_burn_time
 
-        # Record state
-        self.history.append(self.grid.copy())
-        self.stats_history.append(self.get_stats())
+        return changed[new_states == BURNING], changed[new_states == BURNED]
+
+    def _step_vectorized(self):
+        """Whole-grid engine: same rules as the loop, as array operations"""
+        burning = self.grid == BURNING
+        unburned = self.grid == UNBURNED
+        spread_prob = self.spread_prob
+
+        # One independent draw per (direction, target cell), like the loop
+        draws = self.rng.random(spread_prob.shape, dtype=np.float32)
+
+        ignite = np.zeros_like(burning)
+        for n_idx, (dr, dc) in enumerate(NEIGHBORS):
+            # Cells whose neighbor at (-dr, -dc) is burning
+            exposed = shift_mask(burning, dr, dc) & unburned
+            ignite |= exposed & (draws[n_idx] < spread_prob[n_idx])
+
+        new_burn_time = self.burn_time.copy()
+        new_burn_time[burning] -= 1
+
+        burned_out = burning & (new_burn_time <= 0)
+        new_grid = self.grid.copy()
+        new_grid[burned_out] = BURNED
+        new_grid[ignite] = BURNING
+        new_burn_time[ignite] = self.params.burn_duration
+
+        self.grid = new_grid
+        self.burn_time = new_burn_time
+
+        return np.flatnonzero(ignite), np.flatnonzero(burned_out)
+
+    def _get_frontier(self) -> np.ndarray:
+        """Flat indices of the burning cells"""
+        if self._frontier is None:
+            self._frontier = np.flatnonzero(self.grid == BURNING)
+        return self._frontier
+
+    def _step_frontier(self):
+        """Sparse engine: only burning cells and their neighbors are visited.
+
+        Grid and burn time are updated in place, so per-step cost follows the
+        fire perimeter rather than the grid area.
+        """
+        size = self.grid_size
+        front = self._get_frontier()
+        grid = self.grid.reshape(-1)
+        burn_time = self.burn_time.reshape(-1)
+        rows, cols = np.divmod(front, size)
+
+        # One draw per (burning cell, unburned neighbor) pair, like the loop
+        ignited = []
+        for n_idx, (dr, dc) in enumerate(NEIGHBORS):
+            nr, nc = rows + dr, cols + dc
+            valid = (nr >= 0) & (nr < size) & (nc >= 0) & (nc < size)
+            targets = nr[valid] * size + nc[valid]
+            targets = targets[grid[targets] == UNBURNED]
+            spread_prob = self.spread_prob[n_idx].reshape(-1)[targets]
+            ignited.append(targets[self.rng.random(targets.size, dtype=np.float32) < spread_prob])
+        ignited = np.unique(np.concatenate(ignited))
+
+        # Burn down the current front
+        burn_time[front] -= 1
+        burned_out = burn_time[front] <= 0
+        grid[front[burned_out]] = BURNED
+
+        grid[ignited] = BURNING
+        burn_time[ignited] = self.params.burn_duration
+
+        self._frontier = np.concatenate([front[~burned_out], ignited])
+
+        return ignited, front[burned_out]
+
+    def _count_states(self):
+        """Recount cells per state; step() and ignite() keep the counts current"""
+        self.state_counts = np.bincount(self.grid.reshape(-1), minlength=4)
+
+    def is_burning(self) -> bool:
+        """Whether any cell is still on fire"""
+        return bool(self.state_counts[BURNING] > 0)
 
     def get_stats(self) -> dict:
-        """Get current simulation statistics"""
+        """Get current simulation statistics, from counts kept up to date per step"""
         total_cells = self.grid_size * self.grid_size
-        unburned = np.sum(self.grid == UNBURNED)
-        burning = np.sum(self.grid == BURNING)
-        burned = np.sum(self.grid == BURNED)
+        counts = self.state_counts
+        unburned, burning, burned = counts[UNBURNED], counts[BURNING], counts[BURNED]
 
         return {
             'unburned': int(unburned),
@@ -201,75 +618,159 @@ class CellularAutomataFire:
             'affected_pct': float((burning + burned) / total_cells * 100)
         }
 
-    def run(self, time_steps: Optional[int] = None) -> List[dict]:
-        """Run the simulation for specified time steps"""
+    def reset_history(self):
+        """Start recording from the current grid as step 0"""
+        self._count_states()
+        self.history = SimulationHistory(self.grid)
+        self.stats_history = [self.get_stats()]
+        self._pending_ignitions = []
+
+        self.step_count = 0
+        self.ignition_step = np.where(self.grid == BURNING, 0, -1).astype(np.int16)
+        self.ignition_step[self.grid == BURNED] = 0
+        self.burnout_step = np.where(self.grid == BURNED, 0, -1).astype(np.int16)
+
+    def iter_steps(self, time_steps: Optional[int] = None,
+                   stop_when: Sequence[StopPredicate] = (),
+                   record_history: Optional[bool] = None) -> Iterator[StepSnapshot]:
+        """Run the simulation lazily, yielding one snapshot per step.
+
+        The first snapshot is the starting grid (step 0, no changes). The run
+        ends after ``time_steps``, when nothing is burning any more, or after
+        the first step for which a ``stop_when`` predicate returns True; the
+        reason is left in ``stop_reason``. With ``record_history=False``
+        nothing is kept per step during this run, so memory stays O(grid)
+        for any run length.
+        """
         steps = time_steps or self.params.time_steps
+        if steps > MAX_TIME_STEPS:
+            raise ValueError(f"time_steps must be at most {MAX_TIME_STEPS}")
+        # The override applies to this run only
+        if record_history is None:
+            record_history = self.record_history
 
         # Record initial state
-        self.history = [self.grid.copy()]
-        self.stats_history = [self.get_stats()]
+        self.reset_history()
+        self.stop_reason = STOP_TIME_LIMIT
+        empty = np.array([], dtype=np.int64)
+        yield StepSnapshot(0, empty, empty, self.stats_history[0])
 
         for t in range(steps):
-            self.step()
+            ignited, burned_out = self.step(record_history)
+            stats = self.stats_history[-1] if record_history else self.get_stats()
+            snapshot = StepSnapshot(t + 1, ignited, burned_out, stats)
+            yield snapshot
 
             # Stop if no more burning cells
-            if np.sum(self.grid == BURNING) == 0:
+            if not self.is_burning():
+                self.stop_reason = STOP_BURNED_OUT
+                break
+            if any(stop(self, snapshot) for stop in stop_when):
+                self.stop_reason = STOP_CONDITION
                 break
 
-        return self.stats_history
+    def run(self, time_steps: Optional[int] = None,
+            stop_when: Sequence[StopPredicate] = ()) -> List[dict]:
+        """Run the simulation for specified time steps"""
+        for _ in self.iter_steps(time_steps, stop_when):
+            pass
 
-    def create_animation(self, filename: str = 'static/images/fire_simulation.gif',
-                        fps: int = 5) -> str:
-        """Create animated GIF of the simulation"""
-        print("Creating fire spread animation...")
+        return self.stats_history
 
-        # Custom colormap
-        colors = ['#228B22', '#FF4500', '#1a1a1a', '#4169E1']  # Forest, Fire, Burned, Water
-        cmap = ListedColormap(colors)
+    def arrival_step(self, row: int, col: int) -> Optional[int]:
+        """Step at which the fire reached (row, col), or None if it has not"""
+        step = int(self.ignition_step[row, col])
+        return step if step >= 0 else None
+
+    def isochrones(self, interval: Optional[int] = None) -> List[dict]:
+        """Fire front lines every ``interval`` steps, traced on the ignition-step map.
+
+        Each entry holds a step and the contour lines (lists of [row, col]
+        points, between cell centers) around the cells burning or burned by
+        then. Needs ``contourpy``; without it a warning is issued and [] returned.
+        """
+        last = self.step_count
+        if contourpy is None:
+            warnings.warn("contourpy is not installed; isochrones are empty", RuntimeWarning)
+            return []
+        if last == 0:
+            return []
+        if interval is None:
+            interval = max(1, -(-last // ISOCHRONE_COUNT))
+
+        # Cells the fire never reached sort after every level
+        field = np.where(self.ignition_step >= 0, self.ignition_step, last + 1).astype(np.float64)
+        generator = contourpy.contour_generator(z=field)
+
+        return [
+            {
+                'step': level,
+                'lines': [np.round(line[:, ::-1], 2).tolist() for line in generator.lines(level + 0.5)]
+            }
+            for level in range(interval, last + 1, interval)
+        ]
 
-        frames = []
+    def arrival_data(self, isochrone_interval: Optional[int] = None) -> dict:
+        """Ignition / burnout step per cell (-1: never) with derived isochrones"""
+        return {
+            'steps': self.step_count,
+            'ignition_step': self.ignition_step.tolist(),
+            'burnout_step': self.burnout_step.tolist(),
+            'isochrones': self.isochrones(isochrone_interval)
+        }
 
+    def iter_frames(self, cell_px: Optional[int] = None):
+        """Yield one RGB frame per history step, rendered without matplotlib"""
+        renderer = FrameRenderer(self.grid_size, self.params.wind_direction, cell_px)
         for t, grid in enumerate(self.history):
-            fig, ax = plt.subplots(figsize=(8, 8))
+            stats = self.stats_history[min(t, len(self.stats_history)-1)]
+            yield renderer.render(grid, t, stats)
 
-            im = ax.imshow(grid, cmap=cmap, vmin=0, vmax=3)
-            ax.set_title(f'Fire Spread Simulation - Step {t}', fontsize=14, fontweight='bold')
-            ax.set_xlabel('Column', fontsize=11)
-            ax.set_ylabel('Row', fontsize=11)
+    def create_animation(self, filename: str = 'static/images/fire_simulation.gif',
+                        fps: int = 5, cell_px: Optional[int] = None) -> str:
+        """Create an animation of the simulation (.gif, .apng/.png or .mp4)
 
-            # Add stats text
-            stats = self.stats_history[min(t, len(self.stats_history)-1)]
-            stats_text = f"Burning: {stats['burning_pct']:.1f}% | Burned: {stats['burned_pct']:.1f}%"
-            ax.text(0.5, -0.1, stats_text, transform=ax.transAxes,
-                   ha='center', fontsize=11, color='#ff6b6b')
-
-            # Wind arrow
-            wind_rad = np.radians(self.params.wind_direction)
-            ax.annotate('', xy=(0.9 + 0.08 * np.sin(wind_rad), 0.9 - 0.08 * np.cos(wind_rad)),
-                       xytext=(0.9, 0.9), xycoords='axes fraction',
-                       arrowprops=dict(arrowstyle='->', color='white', lw=2))
-            ax.text(0.9, 0.95, 'Wind', transform=ax.transAxes, ha='center',
-                   fontsize=9, color='white')
-
-            plt.tight_layout()
-
-            # Convert to image
-            fig.canvas.draw()
-            image = np.frombuffer(fig.canvas.buffer_rgba(), dtype=np.uint8)
-            image = image.reshape(fig.canvas.get_width_height()[::-1] + (4,))
-            frames.append(image[:, :, :3])  # Remove alpha channel
-
-            plt.close(fig)
-
-        # Save as GIF
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        imageio.mimsave(filename, frames, fps=fps, loop=0)
+        Frames are written one at a time as they are rendered; .mp4 output
+        needs the optional ``imageio-ffmpeg`` package.
+        """
+        print("Creating fire spread animation...")
+
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == '.mp4':
+            writer_kwargs = {'fps': fps, 'macro_block_size': 1}
+        elif ext in ('.gif', '.png', '.apng'):
+            # Milliseconds with the pillow plugin (imageio >= 2.28, see requirements.txt)
+            writer_kwargs = {'mode': 'I', 'duration': 1000 / fps, 'loop': 0}
+            if ext == '.apng':
+                writer_kwargs['extension'] = '.png'
+        else:
+            raise ValueError(f"Unsupported animation format: {ext}")
+
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        with imageio.get_writer(filename, **writer_kwargs) as writer:
+            for frame in self.iter_frames(cell_px):
+                writer.append_data(frame)
         print(f"  Saved: {filename}")
 
         return filename
 
-    def get_simulation_data(self) -> dict:
-        """Get complete simulation data for frontend"""
+    def get_simulation_data(self, history_format: str = 'frames',
+                            isochrone_interval: Optional[int] = None) -> dict:
+        """Get complete simulation data for frontend
+
+        ``history_format`` is ``'frames'`` for one nested list per step,
+        ``'delta'`` for the compact encoding of ``SimulationHistory.to_dict``
+        or ``'none'`` to leave the history out and rely on ``arrival``.
+        """
+        if history_format == 'none':
+            history = None
+        elif history_format == 'delta':
+            history = self.history.to_dict()
+        elif history_format == 'frames':
+            history = [grid.tolist() for grid in self.history]
+        else:
+            raise ValueError(f"Unknown history format: {history_format}")
+
         return {
             'params': {
                 'grid_size': self.params.grid_size,
@@ -279,13 +780,151 @@ class CellularAutomataFire:
                 'humidity': self.params.humidity,
                 'time_steps': len(self.history)
             },
-            'history': [grid.tolist() for grid in self.history],
+            'stop_reason': self.stop_reason,
+            'history': history,
+            'arrival': self.arrival_data(isochrone_interval),
             'stats_history': self.stats_history,
             'vegetation': self.vegetation.tolist(),
             'final_stats': self.stats_history[-1] if self.stats_history else None
         }
 
 
+def _run_ensemble_batch(spread_prob: np.ndarray, initial: np.ndarray, n_runs: int,
+                        time_steps: int, burn_duration: int,
+                        seed: np.random.SeedSequence) -> np.ndarray:
+    """Run ``n_runs`` realizations side by side as one (runs, grid, grid) array.
+
+    Returns the step at which each cell ignited (-1 if it never burned).
+    """
+    rng = np.random.default_rng(seed)
+    shape = (n_runs,) + initial.shape
+    cells = initial.size
+    flat_prob = spread_prob.reshape(len(NEIGHBORS), -1)
+
+    grid = np.broadcast_to(initial, shape).copy()
+    burn_time = np.where(grid == BURNING, burn_duration, 0).astype(np.int16)
+    arrival = np.where(grid == BURNING, 0, -1).astype(np.int16)
+
+    for t in range(1, time_steps + 1):
+        burning = grid == BURNING
+        if not burning.any():
+            break
+        unburned = grid == UNBURNED
+
+        # Draw only for exposed cells, one draw per (direction, target cell)
+        ignite = np.zeros(grid.size, dtype=bool)
+        for n_idx, (dr, dc) in enumerate(NEIGHBORS):
+            exposed = np.flatnonzero(shift_mask(burning, dr, dc) & unburned)
+            prob = flat_prob[n_idx][exposed % cells]
+            ignite[exposed[rng.random(exposed.size, dtype=np.float32) < prob]] = True
+        ignite = ignite.reshape(shape)
+
+        burn_time[burning] -= 1
+        grid[burning & (burn_time <= 0)] = BURNED
+        grid[ignite] = BURNING
+        burn_time[ignite] = burn_duration
+        arrival[ignite] = t
+
+    return arrival
+
+_ensemble_pool = None  # (pid, workers, ProcessPoolExecutor)
+_ensemble_pool_lock = threading.Lock()
+
+def ensemble_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool for ensemble batches, started once per process and reused.
+
+    Spawned, not forked: the API server is multi-threaded and may hold
+    TensorFlow. The pool grows to the largest ``workers`` requested.
+    """
+    global _ensemble_pool
+    with _ensemble_pool_lock:
+        if _ensemble_pool is not None:
+            pid, size, pool = _ensemble_pool
+            if pid == os.getpid() and size >= workers:
+                return pool
+            if pid == os.getpid():
+                pool.shutdown(wait=False)  # Running batches still finish
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        _ensemble_pool = (os.getpid(), workers, pool)
+        return pool
+
+def _discard_ensemble_pool(pool: ProcessPoolExecutor):
+    global _ensemble_pool
+    with _ensemble_pool_lock:
+        if _ensemble_pool is not None and _ensemble_pool[2] is pool:
+            _ensemble_pool = None
+
+def run_ensemble(sim: CellularAutomataFire, n_runs: int = 100, seed: Optional[int] = None,
+                 batch_size: int = 250, workers: int = 1,
+                 quantiles: Sequence[float] = (0.1, 0.5, 0.9),
+                 histogram_bins: int = 20) -> dict:
+    """Monte Carlo ensemble of fire spread from an ignited simulation.
+
+    Every realization shares the spread probabilities, ignition points and
+    time horizon of ``sim``; only the random draws differ. Batches of runs are
+    stepped as 3-D arrays, spread over a reused process pool when ``workers > 1``.
+    Each batch gets its own child stream of ``seed`` (or of the simulation's
+    seed), so results do not depend on ``workers`` or scheduling.
+    """
+    params = sim.params
+    batches = [min(batch_size, n_runs - start) for start in range(0, n_runs, batch_size)]
+    if seed is None:
+        seeds = sim.spawn_seeds(len(batches))
+    else:
+        seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    jobs = [(sim.spread_prob, sim.grid, n, params.time_steps, params.burn_duration, s)
+            for n, s in zip(batches, seeds)]
+
+    if workers > 1 and len(jobs) > 1:
+        pool = ensemble_pool(workers)
+        try:
+            arrivals = list(pool.map(_run_ensemble_batch, *zip(*jobs)))
+        except BrokenProcessPool:
+            # A pool process died; start a fresh pool and retry once
+            _discard_ensemble_pool(pool)
+            arrivals = list(ensemble_pool(workers).map(_run_ensemble_batch, *zip(*jobs)))
+    else:
+        arrivals = [_run_ensemble_batch(*job) for job in jobs]
+    arrival = np.concatenate(arrivals)
+
+    burned = arrival >= 0
+    burn_probability = burned.mean(axis=0)
+
+    # Arrival-time quantiles over the runs in which each cell burned
+    arrival_float = np.where(burned, arrival, np.nan).astype(np.float32)
+    arrival_quantiles = {}
+    for q in quantiles:
+        # Never-burned cells are all-NaN; nanquantile warns about them via warnings.warn
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            arrival_quantiles[q] = np.nanquantile(arrival_float, q, axis=0)
+
+    # Burned area per realization (cells that caught fire, as % of the grid)
+    total_cells = sim.grid_size * sim.grid_size
+    burned_area = burned.reshape(n_runs, -1).sum(axis=1)
+    burned_area_pct = burned_area / total_cells * 100
+    counts, edges = np.histogram(burned_area_pct, bins=histogram_bins)
+
+    return {
+        'n_runs': n_runs,
+        'burn_probability': burn_probability,
+        'arrival_quantiles': arrival_quantiles,
+        'burned_area': burned_area,
+        'burned_area_stats': {
+            'mean_pct': float(burned_area_pct.mean()),
+            'std_pct': float(burned_area_pct.std()),
+            'min_pct': float(burned_area_pct.min()),
+            'max_pct': float(burned_area_pct.max()),
+            'p5_pct': float(np.percentile(burned_area_pct, 5)),
+            'p50_pct': float(np.percentile(burned_area_pct, 50)),
+            'p95_pct': float(np.percentile(burned_area_pct, 95)),
+            'histogram': {
+                'counts': counts.tolist(),
+                'bin_edges_pct': edges.tolist()
+            }
+        }
+    }
+
 def run_demo_simulation():
     """Run a demo simulation"""
     print("="*60)
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Fire Record Store
+Almora Forest Fire Prediction System
+
+Holds the historical fire records together with precomputed analytics
+aggregates that are versioned by the data file and updated incrementally.
+"""
+
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+FIRE_DATA_PATH = 'almora_fake_fire_data.csv'
+FIRE_COLUMNS = ('date', 'latitude', 'longitude', 'fire_occurred', 'brightness', 'confidence')
+MAX_HOTSPOTS = 100
+GRID_CELL_DEG = 0.01  # ~1 km spatial index cells
+EARTH_RADIUS_KM = 6371.0
+
+SEASONS = {
+    'Winter': [12, 1, 2],
+    'Spring': [3, 4, 5],
+    'Summer': [6, 7, 8],
+    'Autumn': [9, 10, 11]
+}
+
+def data_version(path: str) -> str:
+    """Identify a data file by name, modification time and size"""
+    stat = os.stat(path)
+    return f"{os.path.basename(path)}@{stat.st_mtime_ns}-{stat.st_size}"
+
+def parse_bbox(value: str) -> Tuple[float, float, float, float]:
+    """Parse a 'west,south,east,north' bounding box"""
+    try:
+        west, south, east, north = (float(v) for v in value.split(','))
+    except ValueError:
+        raise ValueError("bbox must be 'west,south,east,north'")
+    if west > east or south > north:
+        raise ValueError("bbox must have west <= east and south <= north")
+    return west, south, east, north
+
+def radius_bbox(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Bounding box that contains a circle of ``radius_km`` around a point"""
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = np.degrees(angle)
+    dlon = np.degrees(np.arcsin(min(1.0, np.sin(angle) / max(np.cos(np.radians(lat)), 1e-12))))
+    if dlon >= 90 or abs(lat) + dlat >= 90:
+        dlon = 180.0
+    return lon - dlon, lat - dlat, lon + dlon, lat + dlat
+
+def haversine_km(lat, lon, lat0: float, lon0: float) -> np.ndarray:
+    """Great-circle distance from (lat0, lon0) to arrays of points"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lat0, lon0 = np.radians(lat0), np.radians(lon0)
+    a = (np.sin((lat - lat0) / 2) ** 2
+         + np.cos(lat) * np.cos(lat0) * np.sin((lon - lon0) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def records_frame(records: List[dict]) -> pd.DataFrame:
+    """Validate incoming fire records and convert them to the stored dtypes"""
+    if not isinstance(records, list) or not records:
+        raise ValueError("records must be a non-empty list")
+
+    df = pd.DataFrame(records)
+    missing = [c for c in FIRE_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"records are missing fields: {', '.join(missing)}")
+
+    try:
+        df = df[list(FIRE_COLUMNS)].copy()
+        df['date'] = pd.to_datetime(df['date'])
+        for column in ('fire_occurred', 'latitude', 'longitude', 'brightness', 'confidence'):
+            df[column] = df[column].astype(float)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"invalid record values: {e}")
+
+    def check(valid: pd.Series, message: str):
+        if not valid.all():
+            raise ValueError(f"record {int(np.flatnonzero(~valid.to_numpy())[0])}: {message}")
+
+    check(df['date'].notna(), "date is required")
+    for column in ('latitude', 'longitude', 'brightness', 'confidence'):
+        check(pd.Series(np.isfinite(df[column].to_numpy())), f"{column} must be a finite number")
+    check(df['latitude'].between(-90, 90), "latitude must be between -90 and 90")
+    check(df['longitude'].between(-180, 180), "longitude must be between -180 and 180")
+    check(df['fire_occurred'].isin([0, 1]), "fire_occurred must be 0 or 1")
+
+    df['fire_occurred'] = df['fire_occurred'].astype(int)
+    return df
+
+def record_columns(df: pd.DataFrame) -> Dict[str, list]:
+    """Fire records as column name -> list of JSON-ready values"""
+    return {
+        'date': df['date'].dt.strftime('%Y-%m-%d').tolist(),
+        'latitude': df['latitude'].astype(float).tolist(),
+        'longitude': df['longitude'].astype(float).tolist(),
+        'fire_occurred': df['fire_occurred'].astype(int).tolist(),
+        'brightness': df['brightness'].astype(float).tolist(),
+        'confidence': df['confidence'].astype(float).tolist()
+    }
+
+def serialize_records(df: pd.DataFrame, columnar: bool = False):
+    """Column arrays, or one dict per record built from those columns"""
+    columns = record_columns(df)
+    if columnar:
+        return columns
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+def heatmap_points(df: pd.DataFrame) -> List[list]:
+    """[latitude, longitude, intensity] rows, brightness normalized by 500"""
+    return np.column_stack([
+        df['latitude'].to_numpy(dtype=float),
+        df['longitude'].to_numpy(dtype=float),
+        df['brightness'].to_numpy(dtype=float) / 500
+    ]).tolist()
+
+class SpatialGridIndex:
+    """Grid hash over record coordinates for bounding-box lookups.
+
+    Rows are bucketed into ``cell_deg`` cells and stored sorted by cell key,
+    so the cells of one grid row inside a bbox form a single contiguous run
+    that is found with two binary searches.
+    """
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, cell_deg: float = GRID_CELL_DEG):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.cell_deg = cell_deg
+
+        if len(self.lat):
+            self.lat0, self.lon0 = self.lat.min(), self.lon.min()
+            self.n_rows = int((self.lat.max() - self.lat0) // cell_deg) + 1
+            self.n_cols = int((self.lon.max() - self.lon0) // cell_deg) + 1
+        else:
+            self.lat0 = self.lon0 = 0.0
+            self.n_rows = self.n_cols = 0
+
+        keys = self._keys(self._cell(self.lat, self.lat0), self._cell(self.lon, self.lon0))
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+
+    def _cell(self, values, origin: float) -> np.ndarray:
+        return np.floor((np.asarray(values) - origin) / self.cell_deg).astype(np.int64)
+
+    def _keys(self, rows, cols):
+        return rows * self.n_cols + cols
+
+    def query_bbox(self, west: float, south: float, east: float, north: float) -> np.ndarray:
+        """Sorted row positions of the points inside the bbox"""
+        if not self.n_rows:
+            return np.empty(0, dtype=np.int64)
+
+        r0, r1 = np.clip(self._cell([south, north], self.lat0), 0, self.n_rows - 1)
+        c0, c1 = np.clip(self._cell([west, east], self.lon0), 0, self.n_cols - 1)
+
+        grid_rows = np.arange(r0, r1 + 1)
+        starts = np.searchsorted(self.sorted_keys, self._keys(grid_rows, c0), 'left')
+        stops = np.searchsorted(self.sorted_keys, self._keys(grid_rows, c1), 'right')
+        candidates = np.concatenate([self.order[a:b] for a, b in zip(starts, stops)])
+
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        inside = (lon >= west) & (lon <= east) & (lat >= south) & (lat <= north)
+        return np.sort(candidates[inside])
+
+class FireAggregates:
+    """Dashboard analytics kept as running counts.
+
+    Built once from the loaded records and updated with ``add`` when new
+    records arrive, so ``/api/analytics`` never regroups the full frame.
+    """
+
+    def __init__(self, version: str):
+        self.version = version
+        self.appended = None  # Running hash of the appended records
+
+        self.total_records = 0
+        self.total_fires = 0
+        self.monthly_fires = np.zeros(13, dtype=np.int64)  # Index 0 unused
+        self.yearly_fires: Dict[int, int] = {}
+        self.season_records = dict.fromkeys(SEASONS, 0)
+        self.season_fires = dict.fromkeys(SEASONS, 0)
+        self.hotspots: List[list] = []
+        self.start_date = None
+        self.end_date = None
+
+        self._payload = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, version: str) -> 'FireAggregates':
+        aggregates = cls(version)
+        aggregates._accumulate(df)
+        return aggregates
+
+    @property
+    def etag(self) -> str:
+        # Content based, so processes holding different records never share a tag
+        if self.appended is None:
+            return self.version
+        return f"{self.version}+{self.appended.hexdigest()[:16]}"
+
+    def add(self, df: pd.DataFrame):
+        """Fold newly appended records into the aggregates"""
+        self._accumulate(df)
+        if self.appended is None:
+            self.appended = hashlib.sha1()
+        self.appended.update(pd.util.hash_pandas_object(df[list(FIRE_COLUMNS)], index=False).to_numpy().tobytes())
+
+    def _accumulate(self, df: pd.DataFrame):
+        if df.empty:
+            return
+
+        months = df['date'].dt.month.to_numpy()
+        years = df['date'].dt.year.to_numpy()
+        fire = df['fire_occurred'].to_numpy() == 1
+
+        self.total_records += len(df)
+        self.total_fires += int(df['fire_occurred'].sum())
+        self.monthly_fires += np.bincount(months[fire], minlength=13)
+
+        fire_years, counts = np.unique(years[fire], return_counts=True)
+        for year, count in zip(fire_years.tolist(), counts.tolist()):
+            self.yearly_fires[year] = self.yearly_fires.get(year, 0) + count
+
+        record_counts = np.bincount(months, minlength=13)
+        fire_counts = np.bincount(months, weights=df['fire_occurred'].to_numpy(), minlength=13)
+        for season, season_months in SEASONS.items():
+            self.season_records[season] += int(record_counts[season_months].sum())
+            self.season_fires[season] += int(fire_counts[season_months].sum())
+
+        # Geographic hotspots, in record order
+        room = MAX_HOTSPOTS - len(self.hotspots)
+        if room > 0:
+            self.hotspots.extend(
+                df.loc[fire, ['latitude', 'longitude', 'brightness']].head(room).values.tolist()
+            )
+
+        start, end = df['date'].min(), df['date'].max()
+        self.start_date = start if self.start_date is None else min(self.start_date, start)
+        self.end_date = end if self.end_date is None else max(self.end_date, end)
+
+        self._payload = None
+
+    def to_dict(self, training_stats: Optional[dict] = None) -> dict:
+        return {
+            'success': True,
+            'total_records': self.total_records,
+            'total_fires': self.total_fires,
+            'fire_rate': self.total_fires / self.total_records * 100 if self.total_records else 0.0,
+            'monthly_distribution': self.monthly_fires[1:].tolist(),
+            'yearly_trend': dict(sorted(self.yearly_fires.items())),
+            'seasonal_risk': {
+                season: (self.season_fires[season] / self.season_records[season] * 100
+                         if self.season_records[season] else 0)
+                for season in SEASONS
+            },
+            'hotspots': self.hotspots,
+            'training_stats': training_stats,
+            'date_range': {
+                'start': self.start_date.strftime('%Y-%m-%d'),
+                'end': self.end_date.strftime('%Y-%m-%d')
+            }
+        }
+
+    def payload(self, training_stats: Optional[dict] = None) -> str:
+        """JSON response body, encoded once per version"""
+        if self._payload is None:
+            self._payload = json.dumps(self.to_dict(training_stats))
+        return self._payload
+
+class FireRecordStore:
+    """Fire records kept sorted by date, with precomputed aggregates.
+
+    Date ranges are resolved with a binary search over the sorted dates and
+    bbox / radius filters with a spatial grid index, so queries never copy or
+    mask the whole dataset. Appends build a new frame and index and swap them
+    in, so readers keep a consistent snapshot without locking.
+    """
+
+    def __init__(self, df: pd.DataFrame, version: str):
+        df = df.sort_values('date', kind='stable', ignore_index=True)
+        self._state = self._build_state(df)
+        self.aggregates = FireAggregates.from_frame(df, version)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _build_state(df: pd.DataFrame):
+        return df, df['date'].to_numpy(), SpatialGridIndex(df['latitude'], df['longitude'])
+
+    @classmethod
+    def from_csv(cls, path: str = FIRE_DATA_PATH) -> 'FireRecordStore':
+        df = pd.read_csv(path)
+        df['date'] = pd.to_datetime(df['date'])
+        return cls(df, data_version(path))
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        return self._state[0]
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def date_slice(self, start_date=None, end_date=None) -> slice:
+        """Rows with start_date <= date <= end_date (both optional)"""
+        return self._date_slice(self._state[1], start_date, end_date)
+
+    @staticmethod
+    def _date_slice(dates: np.ndarray, start_date=None, end_date=None) -> slice:
+        lo = 0 if start_date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date)), 'left')
+        hi = len(dates) if end_date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date)), 'right')
+        return slice(int(lo), int(max(lo, hi)))
+
+    def query(self, start_date=None, end_date=None, fire_occurred: Optional[int] = None,
+              min_confidence: Optional[float] = None, max_confidence: Optional[float] = None,
+              bbox: Optional[Tuple[float, float, float, float]] = None,
+              near: Optional[Tuple[float, float, float]] = None) -> pd.DataFrame:
+        """Records in a date range, optionally filtered by fire flag, confidence,
+        bbox (west, south, east, north) and ``near`` (lat, lon, radius_km)"""
+        frame, dates, index = self._state
+        rows = self._date_slice(dates, start_date, end_date)
+
+        if bbox is None and near is None:
+            df = frame.iloc[rows]
+        else:
+            # Spatial lookup first, then keep the positions inside the date range
+            if near is not None:
+                area = radius_bbox(*near)
+                bbox = area if bbox is None else (max(bbox[0], area[0]), max(bbox[1], area[1]),
+                                                  min(bbox[2], area[2]), min(bbox[3], area[3]))
+            positions = index.query_bbox(*bbox)
+            positions = positions[(positions >= rows.start) & (positions < rows.stop)]
+            df = frame.iloc[positions]
+
+        mask = np.ones(len(df), dtype=bool)
+        if fire_occurred is not None:
+            mask &= df['fire_occurred'].to_numpy() == fire_occurred
+        if min_confidence is not None:
+            mask &= df['confidence'].to_numpy() >= min_confidence
+        if max_confidence is not None:
+            mask &= df['confidence'].to_numpy() <= max_confidence
+        if near is not None:
+            lat, lon, radius_km = near
+            mask &= haversine_km(df['latitude'].to_numpy(), df['longitude'].to_numpy(), lat, lon) <= radius_km
+
+        return df if mask.all() else df[mask]
+
+    def append(self, new_records: pd.DataFrame) -> int:
+        """Add records, keeping date order, and update the aggregates"""
+        new_records = new_records.sort_values('date', kind='stable')
+
+        with self.lock:
+            df = self.frame
+            combined = pd.concat([df, new_records], ignore_index=True)
+            if not df.empty and new_records['date'].iloc[0] < df['date'].iloc[-1]:
+                combined = combined.sort_values('date', kind='stable', ignore_index=True)
+
+            self._state = self._build_state(combined)
+            self.aggregates.add(new_records)
+
+        return len(new_records)
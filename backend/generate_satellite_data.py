@@ -1,41 +1,174 @@
+#!/usr/bin/env python3
+"""
+Synthetic Satellite Data Generator
+Almora Forest Fire Prediction System
+
+Generates fake NDVI / LST images for every day of the fire dataset. Days are
+generated in batches (one seeded Generator per batch) by a pool of worker
+processes that write either per-day .npy files or the consolidated cube.
+
+Usage:
+    python generate_satellite_data.py
+    python generate_satellite_data.py --format cube --grid-size 128 --workers 4
+"""
+
+import os
+import argparse
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from satellite_cube import IMAGE_DIR, CUBE_PATH, INDEX_PATH, create_cube
+
+FORMAT_FILES = 'files'
+FORMAT_CUBE = 'cube'
+
+@dataclass
+class GeneratorParams:
+    """Image size, value ranges and burn-scar shape"""
+    grid_size: int = 64
+    ndvi_range: Tuple[float, float] = (0.3, 0.8)
+    lst_range: Tuple[float, float] = (20.0, 35.0)
+    scar_size: int = 20           # Side of the square burn scar in pixels
+    scar_ndvi_factor: float = 0.3  # NDVI multiplier inside the scar
+    scar_lst_delta: float = 15.0   # LST increase inside the scar
+
+def load_fire_days(csv_path: str, start_date: Optional[str] = None,
+                   end_date: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Dates (YYYY-MM-DD) and fire flags from the fire CSV, limited to [start, end]"""
+    fire_df = pd.read_csv(csv_path, usecols=['date', 'fire_occurred'])
+    dates = fire_df['date'].astype(str).str[:10].to_numpy()
+
+    keep = np.ones(len(dates), dtype=bool)
+    if start_date:
+        keep &= dates >= start_date
+    if end_date:
+        keep &= dates <= end_date
+
+    return dates[keep], fire_df['fire_occurred'].to_numpy()[keep].astype(bool)
+
+def generate_batch(fire: np.ndarray, params: GeneratorParams,
+                   rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """NDVI and LST images of shape (days, grid, grid) for a batch of days"""
+    n, size = len(fire), params.grid_size
+    half = params.scar_size // 2
+
+    # Higher NDVI = more vegetation
+    ndvi = rng.uniform(*params.ndvi_range, (n, size, size)).astype(np.float32)
+    lst = rng.uniform(*params.lst_range, (n, size, size)).astype(np.float32)
+
+    # One burn scar per fire day, centred at a random pixel
+    centers = rng.integers(half, size - half, (n, 2))
+    pixels = np.arange(size)
+    rows = (pixels >= centers[:, :1] - half) & (pixels < centers[:, :1] + half)
+    cols = (pixels >= centers[:, 1:] - half) & (pixels < centers[:, 1:] + half)
+    scar = rows[:, :, None] & cols[:, None, :] & fire[:, None, None]
+
+    ndvi[scar] *= params.scar_ndvi_factor  # Burn mark
+    lst[scar] += params.scar_lst_delta     # Hot spot
+    return ndvi, lst
+
+def _write_files(dates, ndvi, lst, output_dir: str):
+    for date, ndvi_day, lst_day in zip(dates, ndvi, lst):
+        np.save(os.path.join(output_dir, f'ndvi_{date}.npy'), ndvi_day)
+        np.save(os.path.join(output_dir, f'lst_{date}.npy'), lst_day)
+
+def _generate_shard(dates, fire, offset: int, params: GeneratorParams, seed,
+                    output_format: str, output_dir: str, cube_path: str) -> int:
+    """Generate and write one shard of consecutive days; runs in a worker"""
+    ndvi, lst = generate_batch(fire, params, np.random.default_rng(seed))
+
+    if output_format == FORMAT_CUBE:
+        cube = np.load(cube_path, mmap_mode='r+')
+        cube[offset:offset + len(dates), :, :, 0] = ndvi
+        cube[offset:offset + len(dates), :, :, 1] = lst
+        cube.flush()
+    else:
+        _write_files(dates, ndvi, lst, output_dir)
+
+    return len(dates)
+
+def generate_dataset(dates: np.ndarray, fire: np.ndarray, params: GeneratorParams = None,
+                     output_format: str = FORMAT_FILES, output_dir: str = IMAGE_DIR,
+                     cube_path: str = CUBE_PATH, index_path: str = INDEX_PATH,
+                     seed: Optional[int] = None, shard_days: int = 128,
+                     workers: int = 1) -> int:
+    """Generate images for all ``dates`` and write them in shards.
+
+    Every shard draws from its own child of ``seed``, so the output is the
+    same for any number of workers.
+    """
+    if output_format not in (FORMAT_FILES, FORMAT_CUBE):
+        raise ValueError(f"Unknown output format '{output_format}'")
+
+    params = params or GeneratorParams()
+    if not 0 < params.scar_size < params.grid_size:
+        raise ValueError("scar_size must be between 0 and grid_size")
+
+    order = np.argsort(dates, kind='stable')
+    dates, fire = dates[order], fire[order]
+
+    if output_format == FORMAT_CUBE:
+        # Allocate the file only; the returned memmap is dropped at once and
+        # each shard reopens the cube to fill its own days
+        create_cube(list(dates), (params.grid_size, params.grid_size), cube_path, index_path)
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+
+    offsets = range(0, len(dates), shard_days)
+    seeds = np.random.SeedSequence(seed).spawn(len(offsets))
+    jobs = [
+        (dates[o:o + shard_days], fire[o:o + shard_days], o, params, s,
+         output_format, output_dir, cube_path)
+        for o, s in zip(offsets, seeds)
+    ]
+
+    written = 0
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for count in pool.map(_generate_shard, *zip(*jobs)):
+                written += count
+                print(f"Processed {written}/{len(dates)} images")
+    else:
+        for job in jobs:
+            written += _generate_shard(*job)
+            print(f"Processed {written}/{len(dates)} images")
+
+    return written
+
+def main():
+    defaults = GeneratorParams()
+    parser = argparse.ArgumentParser(description='Generate fake satellite images for the fire dataset')
+    parser.add_argument('--csv', default='almora_fake_fire_data.csv')
+    parser.add_argument('--start', help='First date to generate (YYYY-MM-DD)')
+    parser.add_argument('--end', help='Last date to generate (YYYY-MM-DD)')
+    parser.add_argument('--format', choices=(FORMAT_FILES, FORMAT_CUBE), default=FORMAT_FILES,
+                        help='Per-day ndvi_/lst_ .npy files, or the memory-mapped cube')
+    parser.add_argument('--output-dir', default=IMAGE_DIR)
+    parser.add_argument('--cube', default=CUBE_PATH)
+    parser.add_argument('--index', default=INDEX_PATH)
+    parser.add_argument('--grid-size', type=int, default=defaults.grid_size)
+    parser.add_argument('--scar-size', type=int, default=defaults.scar_size)
+    parser.add_argument('--scar-ndvi-factor', type=float, default=defaults.scar_ndvi_factor)
+    parser.add_argument('--scar-lst-delta', type=float, default=defaults.scar_lst_delta)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--shard-days', type=int, default=128)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    params = GeneratorParams(grid_size=args.grid_size, scar_size=args.scar_size,
+                             scar_ndvi_factor=args.scar_ndvi_factor,
+                             scar_lst_delta=args.scar_lst_delta)
+
+    dates, fire = load_fire_days(args.csv, args.start, args.end)
+
+    print("Generating fake satellite images...")
+    count = generate_dataset(dates, fire, params, args.format, args.output_dir,
+                             args.cube, args.index, args.seed, args.shard_days, args.workers)
+
+    print(f"Done! Satellite data generated for {count} days.")
 
-# Create directory for fake satellite images
-os.makedirs('satellite_images', exist_ok=True)
-
-# Load your fire data
-fire_df = pd.read_csv('almora_fake_fire_data.csv')
-
-# Generate fake satellite data for each date
-print("Generating fake satellite images...")
-
-for idx, row in fire_df.iterrows():
-    date = row['date']
-    fire = row['fire_occurred']
-    
-    # Generate fake NDVI (vegetation index) - 64x64 image
-    # Higher values = more vegetation
-    ndvi = np.random.uniform(0.3, 0.8, (64, 64))
-    
-    # If fire occurred, reduce NDVI in a random spot
-    if fire == 1:
-        x, y = np.random.randint(10, 54, 2)
-        ndvi[x-10:x+10, y-10:y+10] *= 0.3  # Burn mark
-    
-    # Generate fake LST (land surface temperature)
-    # Higher temps in fire areas
-    lst = np.random.uniform(20, 35, (64, 64))
-    if fire == 1:
-        lst[x-10:x+10, y-10:y+10] += 15  # Hot spot
-    
-    # Save as numpy arrays
-    np.save(f'satellite_images/ndvi_{date}.npy', ndvi)
-    np.save(f'satellite_images/lst_{date}.npy', lst)
-    
-    if idx % 100 == 0:
-        print(f"Processed {idx}/{len(fire_df)} images")
-
-print("Done! Satellite data generated.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Gunicorn Configuration
+Almora Forest Fire Prediction System
+
+Usage (from backend/):
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+import multiprocessing
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('THREADS', 4))
+
+# Workers load TensorFlow and the model before serving
+timeout = 120
+
+# Import wsgi.py (fire data, tile grids, satellite cube mapping) once in the
+# master; forked workers share those pages copy-on-write
+preload_app = True
+
+def post_fork(server, worker):
+    import app
+    app.init_worker()
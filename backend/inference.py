@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Fire Risk Inference Service
+Almora Forest Fire Prediction System
+
+Caches prepared 5-day input windows and risk maps, and micro-batches
+concurrent prediction requests into a single model.predict call.
+"""
+
+import os
+import time
+import queue
+import threading
+import numpy as np
+from concurrent.futures import Future
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+
+from cache import LRUCache
+
+SEQUENCE_LENGTH = 5
+MODEL_PATHS = ('models/almora_fire_model.keras', 'models/almora_fire_model.h5')
+
+def find_model_path() -> Optional[str]:
+    """First trained model file that exists, found without importing TensorFlow"""
+    for model_path in MODEL_PATHS:
+        if os.path.exists(model_path):
+            return model_path
+    return None
+
+def load_trained_model():
+    """Load the first trained model found; returns (model, path) or (None, None)"""
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+    import tensorflow as tf
+    tf.get_logger().setLevel('ERROR')
+
+    for model_path in MODEL_PATHS:
+        if os.path.exists(model_path):
+            try:
+                return tf.keras.models.load_model(model_path), model_path
+            except Exception as e:
+                print(f"Error loading model: {e}")
+
+    return None, None
+
+def model_version(model_path: str) -> str:
+    """Identify a model file by name and modification time"""
+    return f"{os.path.basename(model_path)}@{int(os.path.getmtime(model_path))}"
+
+def normalize_image(image: np.ndarray) -> np.ndarray:
+    """Min-max normalize one image to [0, 1]"""
+    return (image - image.min()) / (image.max() - image.min() + 1e-8)
+
+def risk_from_prediction(prediction: np.ndarray) -> np.ndarray:
+    """Turn one (H, W, 2) model output into a contrast-stretched risk map"""
+    # Use LST channel as fire risk (higher temp = higher risk)
+    risk_map = prediction[:, :, 1]
+
+    # Enhance contrast
+    return (risk_map - risk_map.min()) / (risk_map.max() - risk_map.min() + 1e-8)
+
+def _date_range(start_date: str, end_date: str) -> List[str]:
+    start = date.fromisoformat(start_date)
+    days = (date.fromisoformat(end_date) - start).days
+    return [(start + timedelta(days=i)).isoformat() for i in range(days + 1)]
+
+def sliding_windows(cube, start_date: str, end_date: str):
+    """Model inputs for every target date in [start, end] that the cube covers.
+
+    Normalizes the needed slice of the cube once and returns
+    ``(target_dates, windows, positions)``: ``windows`` is a
+    (n, 5, H, W, 2) sliding-window view over that slice (no per-window copy)
+    and ``windows[positions[i]]`` is the input for ``target_dates[i]``.
+    """
+    first = (date.fromisoformat(start_date) - timedelta(days=SEQUENCE_LENGTH)).isoformat()
+    last = (date.fromisoformat(end_date) - timedelta(days=1)).isoformat()
+    lo, hi = bisect_left(cube.dates, first), bisect_right(cube.dates, last)
+
+    images = cube.data[lo:hi]
+    if len(images) < SEQUENCE_LENGTH:
+        return [], np.empty((0, SEQUENCE_LENGTH) + cube.data.shape[1:], dtype=np.float32), np.array([], dtype=int)
+
+    # Per-image, per-channel min-max normalization, as for single predictions
+    mins = images.min(axis=(1, 2), keepdims=True)
+    maxs = images.max(axis=(1, 2), keepdims=True)
+    normalized = ((images - mins) / (maxs - mins + 1e-8)).astype(np.float32)
+    windows = np.moveaxis(sliding_window_view(normalized, SEQUENCE_LENGTH, axis=0), -1, 1)
+
+    # Keep windows of consecutive days whose following day is in range
+    ordinals = np.array([date.fromisoformat(d).toordinal() for d in cube.dates[lo:hi]])
+    window_last = ordinals[SEQUENCE_LENGTH - 1:]
+    consecutive = window_last - ordinals[:len(window_last)] == SEQUENCE_LENGTH - 1
+    targets = window_last + 1
+    in_range = ((targets >= date.fromisoformat(start_date).toordinal())
+                & (targets <= date.fromisoformat(end_date).toordinal()))
+    positions = np.flatnonzero(consecutive & in_range)
+
+    target_dates = [date.fromordinal(int(o)).isoformat() for o in targets[positions]]
+    return target_dates, windows, positions
+
+class MicroBatcher:
+    """Collects concurrent single-sample requests into batched predict calls.
+
+    The first request opens a batch; requests arriving within ``max_wait_ms``
+    (up to ``max_batch``) join it before the model runs once on all of them.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray],
+                 max_batch: int = 32, max_wait_ms: float = 10.0):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.samples = 0
+
+        self._worker = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, x: np.ndarray) -> Future:
+        """Queue one input sample; the future resolves to its prediction"""
+        future = Future()
+        self._queue.put((x, future))
+        return future
+
+    def _collect(self) -> List[Tuple[np.ndarray, Future]]:
+        batch = [self._queue.get()]
+        end = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            remaining = end - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                predictions = self.predict_fn(np.stack([x for x, _ in batch]))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.samples += len(batch)
+            for (_, future), prediction in zip(batch, predictions):
+                future.set_result(prediction)
+
+class InferenceService:
+    """Risk map prediction with window/risk-map caches and micro-batching"""
+
+    def __init__(self, model, version: str,
+                 load_day: Callable[[str], Optional[Tuple[np.ndarray, np.ndarray]]],
+                 cube=None, window_cache_size: int = 64, risk_cache_size: int = 256,
+                 max_batch: int = 32, max_wait_ms: float = 10.0):
+        self.model = model
+        self.version = version
+        self.load_day = load_day
+        self.cube = cube
+
+        self.windows = LRUCache(window_cache_size)
+        self.risk_maps = LRUCache(risk_cache_size)
+        self.batcher = MicroBatcher(self._predict_batch, max_batch, max_wait_ms)
+
+    def _predict_batch(self, X: np.ndarray) -> np.ndarray:
+        return self.model.predict(X, verbose=0)
+
+    def warm_up(self):
+        """Run one dummy prediction so the first request does not pay for tracing"""
+        self._predict_batch(np.zeros((1,) + tuple(self.model.input_shape[1:]), dtype=np.float32))
+
+    def _build_window(self, date_str: str) -> Optional[np.ndarray]:
+        target_date = datetime.strptime(date_str, '%Y-%m-%d')
+        sequence = []
+
+        for i in range(SEQUENCE_LENGTH, 0, -1):
+            date = (target_date - timedelta(days=i)).strftime('%Y-%m-%d')
+            images = self.load_day(date)
+            if images is None:
+                return None
+
+            ndvi, lst = images
+            sequence.append(np.stack([normalize_image(ndvi), normalize_image(lst)], axis=-1))
+
+        window = np.stack(sequence).astype(np.float32)
+        window.setflags(write=False)
+        return window
+
+    def prepare_window(self, date_str: str) -> Optional[np.ndarray]:
+        """Normalized (5, H, W, 2) input for the days before ``date_str``"""
+        return self.windows.get_or_create(date_str, lambda: self._build_window(date_str))
+
+    def predict_risk_map(self, date_str: str) -> Optional[np.ndarray]:
+        """Risk map for a date, or None if its satellite window is incomplete"""
+        key = (self.version, date_str)
+        risk_map = self.risk_maps.get(key)
+        if risk_map is not None:
+            return risk_map
+
+        window = self.prepare_window(date_str)
+        if window is None:
+            return None
+
+        prediction = self.batcher.submit(window).result()
+        risk_map = risk_from_prediction(prediction)
+        risk_map.setflags(write=False)
+        self.risk_maps.put(key, risk_map)
+        return risk_map
+
+    def predict_range(self, start_date: str, end_date: str,
+                      batch_size: int = 64) -> Dict[str, np.ndarray]:
+        """Risk maps for every date in [start, end] with a complete input window.
+
+        Inputs come from sliding-window views over the cube when it is loaded,
+        and are run through the model ``batch_size`` windows at a time.
+        """
+        if self.cube is not None:
+            dates, windows, positions = sliding_windows(self.cube, start_date, end_date)
+        else:
+            dates, inputs = [], []
+            for date_str in _date_range(start_date, end_date):
+                window = self.prepare_window(date_str)
+                if window is not None:
+                    dates.append(date_str)
+                    inputs.append(window)
+            windows = np.stack(inputs) if inputs else None
+            positions = np.arange(len(dates))
+
+        results = {}
+        todo = []
+        for date_str, position in zip(dates, positions):
+            cached = self.risk_maps.get((self.version, date_str))
+            if cached is not None:
+                results[date_str] = cached
+            else:
+                todo.append((date_str, position))
+
+        for b in range(0, len(todo), batch_size):
+            chunk = todo[b:b + batch_size]
+            predictions = self._predict_batch(windows[[p for _, p in chunk]])
+            for (date_str, _), prediction in zip(chunk, predictions):
+                risk_map = risk_from_prediction(prediction)
+                risk_map.setflags(write=False)
+                self.risk_maps.put((self.version, date_str), risk_map)
+                results[date_str] = risk_map
+
+        return dict(sorted(results.items()))
+
+    def stats(self) -> dict:
+        return {
+            'model_version': self.version,
+            'window_cache': self.windows.stats(),
+            'risk_cache': self.risk_maps.stats(),
+            'batches': self.batcher.batches,
+            'batched_samples': self.batcher.samples
+        }
@@ -24,6 +24,8 @@ import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
 import matplotlib.pyplot as plt
 
+from satellite_cube import load_cube, date_key
+
 # Configuration
 SEQUENCE_LENGTH = 5
 IMAGE_SIZE = 64
@@ -47,28 +49,31 @@ def load_satellite_images(dates):
     lst_list = []
     valid_dates = []
 
-    for i, date in enumerate(dates):
-        # Handle different date formats
-        if hasattr(date, 'strftime'):
-            date_str = date.strftime('%Y-%m-%d')
-        elif hasattr(date, 'astype'):
-            # numpy datetime64
-            date_str = str(date)[:10]
-        else:
-            date_str = str(date)[:10]
-
-        ndvi_path = f'satellite_images/ndvi_{date_str}.npy'
-        lst_path = f'satellite_images/lst_{date_str}.npy'
-
-        if os.path.exists(ndvi_path) and os.path.exists(lst_path):
-            ndvi = np.load(ndvi_path)
-            lst = np.load(lst_path)
-            ndvi_list.append(ndvi)
-            lst_list.append(lst)
-            valid_dates.append(date)
-
-        if i % 500 == 0:
-            print(f"  Loaded {i}/{len(dates)} images")
+    cube = load_cube()
+    if cube is not None:
+        # One slice lookup into the memory-mapped cube instead of 2 files per day
+        positions = [cube.index_of(date) for date in dates]
+        valid_dates = [date for date, i in zip(dates, positions) if i is not None]
+        images = cube.data[[i for i in positions if i is not None]]
+        ndvi_list = images[..., 0]
+        lst_list = images[..., 1]
+        print(f"  Read {len(valid_dates)}/{len(dates)} days from satellite cube")
+    else:
+        for i, date in enumerate(dates):
+            date_str = date_key(date)
+
+            ndvi_path = f'satellite_images/ndvi_{date_str}.npy'
+            lst_path = f'satellite_images/lst_{date_str}.npy'
+
+            if os.path.exists(ndvi_path) and os.path.exists(lst_path):
+                ndvi = np.load(ndvi_path)
+                lst = np.load(lst_path)
+                ndvi_list.append(ndvi)
+                lst_list.append(lst)
+                valid_dates.append(date)
+
+            if i % 500 == 0:
+                print(f"  Loaded {i}/{len(dates)} images")
 
     print(f"  Successfully loaded {len(ndvi_list)} image pairs")
 
@@ -80,43 +85,50 @@ def load_satellite_images(dates):
         lst_list = [np.random.uniform(20, 45, (64, 64)) for _ in range(num_days)]
         valid_dates = list(dates)
 
-    # Normalize images
-    ndvi_arr = np.array(ndvi_list)
-    lst_arr = np.array(lst_list)
-
-    # Normalize NDVI to [0, 1]
-    ndvi_norm = (ndvi_arr - ndvi_arr.min()) / (ndvi_arr.max() - ndvi_arr.min() + 1e-8)
+    # Stack as float32 channels (samples, height, width, channels)
+    images = np.stack([np.asarray(ndvi_list), np.asarray(lst_list)], axis=-1)
+    images = images.astype(np.float32, copy=False)
 
-    # Normalize LST to [0, 1]
-    lst_norm = (lst_arr - lst_arr.min()) / (lst_arr.max() - lst_arr.min() + 1e-8)
+    # Normalize NDVI and LST to [0, 1] in place
+    for c in range(images.shape[-1]):
+        channel = images[..., c]
+        channel_min, channel_max = channel.min(), channel.max()
+        channel -= channel_min
+        channel /= (channel_max - channel_min + 1e-8)
 
-    # Stack as channels (samples, height, width, channels)
-    images = np.stack([ndvi_norm, lst_norm], axis=-1)
-    print(f"  Final image shape: {images.shape}")
+    print(f"  Final image shape: {images.shape} ({images.nbytes / 1e6:.0f} MB)")
 
     return images, valid_dates
 
-def create_sequences(images, fire_data, sequence_length=SEQUENCE_LENGTH):
-    """Create time-series sequences for training"""
-    print(f"Creating sequences of length {sequence_length}...")
+def split_sequence_starts(num_images, fire_data, sequence_length=SEQUENCE_LENGTH):
+    """Split window start indices into train/test sets without building windows"""
+    print(f"Indexing sequences of length {sequence_length}...")
 
-    X, y, y_fire = [], [], []
+    starts = np.arange(num_images - sequence_length)
 
-    for i in range(len(images) - sequence_length):
-        X.append(images[i:i+sequence_length])
-        y.append(images[i+sequence_length])
-        # Binary fire classification for the target day
-        y_fire.append(fire_data['fire_occurred'].iloc[i+sequence_length])
+    # Binary fire classification for the target day
+    y_fire = fire_data['fire_occurred'].values[starts + sequence_length]
+    print(f"  Sequences: {len(starts)}")
+    print(f"  Fire labels: {y_fire.sum()} fires out of {len(y_fire)} samples")
 
-    X = np.array(X)
-    y = np.array(y)
-    y_fire = np.array(y_fire)
+    return train_test_split(starts, test_size=0.2, random_state=42)
 
-    print(f"  X shape: {X.shape}")
-    print(f"  y shape: {y.shape}")
-    print(f"  Fire labels: {y_fire.sum()} fires out of {len(y_fire)} samples")
+def make_dataset(images, starts, sequence_length=SEQUENCE_LENGTH,
+                 batch_size=BATCH_SIZE, shuffle=False):
+    """tf.data pipeline that slices (window, next day) pairs from the images lazily"""
 
-    return X, y, y_fire
+    window_shape = [sequence_length] + list(images.shape[1:])
+
+    def window(i):
+        # Static window length, needed by the TimeDistributed layers
+        X = tf.ensure_shape(images[i:i + sequence_length], window_shape)
+        return X, images[i + sequence_length]
+
+    dataset = tf.data.Dataset.from_tensor_slices(starts.astype(np.int32))
+    if shuffle:
+        dataset = dataset.shuffle(len(starts), seed=42, reshuffle_each_iteration=True)
+    dataset = dataset.map(window, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
 
 def build_cnn_lstm_model(input_shape):
     """Build the CNN-LSTM hybrid model"""
@@ -164,7 +176,7 @@ def build_cnn_lstm_model(input_shape):
 
     return model
 
-def train_model(X_train, X_test, y_train, y_test):
+def train_model(train_ds, test_ds):
     """Train the CNN-LSTM model"""
 
     input_shape = (SEQUENCE_LENGTH, IMAGE_SIZE, IMAGE_SIZE, 2)
@@ -198,10 +210,9 @@ def train_model(X_train, X_test, y_train, y_test):
 
     print("\nTraining model...")
     history = model.fit(
-        X_train, y_train,
-        validation_data=(X_test, y_test),
+        train_ds,
+        validation_data=test_ds,
         epochs=EPOCHS,
-        batch_size=BATCH_SIZE,
         callbacks=callbacks,
         verbose=1
     )
@@ -312,23 +323,23 @@ def main():
     fire_df = load_fire_data()
     images, valid_dates = load_satellite_images(fire_df['date'].values)
 
-    # Create sequences
-    X, y, y_fire = create_sequences(images, fire_df)
+    # Split window indices; windows are sliced on the fly from one image tensor
+    train_starts, test_starts = split_sequence_starts(len(images), fire_df)
+    images = tf.constant(images)
 
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+    train_ds = make_dataset(images, train_starts, shuffle=True)
+    test_ds = make_dataset(images, test_starts)
 
-    print(f"\nTraining samples: {len(X_train)}")
-    print(f"Test samples: {len(X_test)}")
+    print(f"\nTraining samples: {len(train_starts)}")
+    print(f"Test samples: {len(test_starts)}")
 
     # Train model
-    model, history = train_model(X_train, X_test, y_train, y_test)
+    model, history = train_model(train_ds, test_ds)
 
     # Save visualizations
     plot_training_history(history)
-    plot_predictions(model, X_test, y_test)
+    X_sample, y_sample = next(iter(test_ds.unbatch().batch(5)))
+    plot_predictions(model, X_sample.numpy(), y_sample.numpy())
 
     # Save statistics
     stats = save_training_stats(history, fire_df)
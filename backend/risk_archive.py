@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Precomputed Risk Map Archive
+Almora Forest Fire Prediction System
+
+Runs the CNN-LSTM over a whole date range in large batches and stores the
+risk maps as one date-indexed float16 array that the API reads directly.
+
+Usage:
+    python risk_archive.py --start 2023-03-01 --end 2023-06-30
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from typing import Dict, Optional
+
+ARCHIVE_PATH = 'models/risk_archive.npy'
+ARCHIVE_INDEX_PATH = 'models/risk_archive_index.json'
+
+def write_archive(risk_maps: Dict[str, np.ndarray], version: str,
+                  archive_path: str = ARCHIVE_PATH, index_path: str = ARCHIVE_INDEX_PATH):
+    """Write date -> risk map entries as a float16 (dates, H, W) array plus index"""
+    dates = sorted(risk_maps)
+    if not dates:
+        raise ValueError("No risk maps to write")
+    os.makedirs(os.path.dirname(archive_path) or '.', exist_ok=True)
+    np.save(archive_path, np.stack([risk_maps[d] for d in dates]).astype(np.float16))
+    with open(index_path, 'w') as f:
+        json.dump({'model_version': version, 'dates': dates}, f)
+
+class RiskArchive:
+    """Memory-mapped, read-only archive of precomputed risk maps"""
+
+    def __init__(self, archive_path: str = ARCHIVE_PATH, index_path: str = ARCHIVE_INDEX_PATH):
+        self.data = np.load(archive_path, mmap_mode='r')
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+
+        self.model_version = index['model_version']
+        self.dates = index['dates']
+        self._index = {d: i for i, d in enumerate(self.dates)}
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __contains__(self, date_str: str) -> bool:
+        return date_str in self._index
+
+    def get(self, date_str: str) -> Optional[np.ndarray]:
+        """Risk map for a date as float32, or None if it was not precomputed"""
+        i = self._index.get(date_str)
+        return None if i is None else self.data[i].astype(np.float32)
+
+    def items(self):
+        for date_str in self.dates:
+            yield date_str, self.get(date_str)
+
+def load_archive(archive_path: str = ARCHIVE_PATH,
+                 index_path: str = ARCHIVE_INDEX_PATH) -> Optional[RiskArchive]:
+    """Open the archive if it has been built, otherwise return None"""
+    if not (os.path.exists(archive_path) and os.path.exists(index_path)):
+        return None
+    try:
+        return RiskArchive(archive_path, index_path)
+    except Exception as e:
+        print(f"Error loading risk archive: {e}")
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute risk maps for a date range')
+    parser.add_argument('--start', required=True, help='First target date (YYYY-MM-DD)')
+    parser.add_argument('--end', required=True, help='Last target date (YYYY-MM-DD)')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--archive', default=ARCHIVE_PATH)
+    parser.add_argument('--index', default=ARCHIVE_INDEX_PATH)
+    args = parser.parse_args()
+
+    from satellite_cube import load_cube
+    from inference import InferenceService, load_trained_model, model_version
+
+    cube = load_cube()
+    if cube is None:
+        print("Satellite cube not found, build it first with: python satellite_cube.py")
+        return
+
+    model, model_path = load_trained_model()
+    if model is None:
+        print("No trained model found in models/")
+        return
+
+    version = model_version(model_path)
+    service = InferenceService(model, version, lambda _: None, cube=cube)
+
+    print(f"Predicting {args.start} .. {args.end} with {version}...")
+    risk_maps = service.predict_range(args.start, args.end, batch_size=args.batch_size)
+    print(f"  Predicted {len(risk_maps)} days")
+    if not risk_maps:
+        print("No days predicted: the satellite cube has no complete 5-day window in that range")
+        sys.exit(1)
+
+    # Extend an existing archive built by the same model
+    existing = load_archive(args.archive, args.index)
+    if existing is not None and existing.model_version == version:
+        risk_maps = {**dict(existing.items()), **risk_maps}
+
+    write_archive(risk_maps, version, args.archive, args.index)
+    print(f"  Saved {len(risk_maps)} risk maps to {args.archive}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Satellite Image Cube
+Almora Forest Fire Prediction System
+
+Packs the per-day ndvi_*.npy / lst_*.npy files into one date-indexed,
+memory-mapped float32 array of shape (time, height, width, channel).
+"""
+
+import os
+import re
+import json
+import argparse
+import numpy as np
+from typing import List, Optional
+
+IMAGE_DIR = 'satellite_images'
+CUBE_PATH = os.path.join(IMAGE_DIR, 'cube.npy')
+INDEX_PATH = os.path.join(IMAGE_DIR, 'cube_index.json')
+CHANNELS = ('ndvi', 'lst')
+
+_FILE_PATTERN = re.compile(r'^ndvi_(\d{4}-\d{2}-\d{2})\.npy$')
+
+def date_key(date) -> str:
+    """Normalize a date, Timestamp, datetime64 or string to YYYY-MM-DD"""
+    if hasattr(date, 'strftime'):
+        return date.strftime('%Y-%m-%d')
+    return str(date)[:10]
+
+def _write_index(dates: List[str], image_shape, index_path: str):
+    with open(index_path, 'w') as f:
+        json.dump({
+            'dates': list(dates),
+            'channels': list(CHANNELS),
+            'image_shape': list(image_shape)
+        }, f)
+
+def create_cube(dates: List[str], image_shape, cube_path: str = CUBE_PATH,
+                index_path: str = INDEX_PATH) -> np.memmap:
+    """Allocate an empty cube file for ``dates`` and write its index.
+
+    Returns the writable memmap; other processes can fill disjoint day
+    ranges by reopening ``cube_path`` with ``np.load(..., mmap_mode='r+')``.
+    """
+    os.makedirs(os.path.dirname(cube_path) or '.', exist_ok=True)
+    cube = np.lib.format.open_memmap(cube_path, mode='w+', dtype=np.float32,
+                                     shape=(len(dates),) + tuple(image_shape) + (len(CHANNELS),))
+    _write_index(dates, image_shape, index_path)
+    return cube
+
+def build_cube(image_dir: str = IMAGE_DIR, cube_path: str = CUBE_PATH,
+               index_path: str = INDEX_PATH) -> int:
+    """Consolidate every day that has both NDVI and LST images into a cube"""
+    dates = sorted(
+        m.group(1) for m in map(_FILE_PATTERN.match, os.listdir(image_dir))
+        if m and os.path.exists(os.path.join(image_dir, f'lst_{m.group(1)}.npy'))
+    )
+    if not dates:
+        raise FileNotFoundError(f"No ndvi_*/lst_* image pairs found in {image_dir}")
+
+    image_shape = np.load(os.path.join(image_dir, f'ndvi_{dates[0]}.npy')).shape
+    cube = create_cube(dates, image_shape, cube_path, index_path)
+
+    for i, date in enumerate(dates):
+        for c, channel in enumerate(CHANNELS):
+            cube[i, :, :, c] = np.load(os.path.join(image_dir, f'{channel}_{date}.npy'))
+
+        if i % 500 == 0:
+            print(f"  Packed {i}/{len(dates)} days")
+
+    cube.flush()
+    del cube
+    return len(dates)
+
+class SatelliteCube:
+    """Read-only, memory-mapped view of the consolidated satellite images"""
+
+    def __init__(self, cube_path: str = CUBE_PATH, index_path: str = INDEX_PATH):
+        self.data = np.load(cube_path, mmap_mode='r')
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+
+        self.dates = index['dates']
+        self.channels = index['channels']
+        self._index = {date: i for i, date in enumerate(self.dates)}
+
+        if len(self.dates) != self.data.shape[0]:
+            raise ValueError(f"Cube index has {len(self.dates)} dates but cube has "
+                             f"{self.data.shape[0]} images")
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __contains__(self, date) -> bool:
+        return date_key(date) in self._index
+
+    def index_of(self, date) -> Optional[int]:
+        """Position of a date in the cube, or None if it is missing"""
+        return self._index.get(date_key(date))
+
+    def get(self, date) -> Optional[np.ndarray]:
+        """(H, W, channel) view for one day, or None if it is missing"""
+        i = self.index_of(date)
+        return None if i is None else self.data[i]
+
+    def indices(self, dates) -> Optional[np.ndarray]:
+        """Positions of several dates, or None if any of them is missing"""
+        positions = [self.index_of(d) for d in dates]
+        if any(i is None for i in positions):
+            return None
+        return np.array(positions)
+
+    def take(self, dates) -> Optional[np.ndarray]:
+        """(len(dates), H, W, channel) images, a view when the dates are consecutive"""
+        positions = self.indices(dates)
+        if positions is None:
+            return None
+        if len(positions) and np.all(np.diff(positions) == 1):
+            return self.data[positions[0]:positions[-1] + 1]
+        return self.data[positions]
+
+def load_cube(cube_path: str = CUBE_PATH, index_path: str = INDEX_PATH) -> Optional[SatelliteCube]:
+    """Open the cube if it has been built, otherwise return None"""
+    if not (os.path.exists(cube_path) and os.path.exists(index_path)):
+        return None
+    try:
+        return SatelliteCube(cube_path, index_path)
+    except Exception as e:
+        print(f"Error loading satellite cube: {e}")
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack per-day satellite .npy files into one cube')
+    parser.add_argument('--image-dir', default=IMAGE_DIR)
+    parser.add_argument('--cube', default=CUBE_PATH)
+    parser.add_argument('--index', default=INDEX_PATH)
+    args = parser.parse_args()
+
+    print("Building satellite image cube...")
+    count = build_cube(args.image_dir, args.cube, args.index)
+    print(f"  Saved {count} days to {args.cube} (index: {args.index})")
+
+if __name__ == "__main__":
+    main()
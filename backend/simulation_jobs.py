@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Simulation Job Queue
+Almora Forest Fire Prediction System
+
+Runs fire spread simulations on a small pool of background threads. Jobs wait
+in a bounded queue, publish their progress after every step and can be
+cancelled while queued or running. Job status, per-step changes and results
+are kept in a SQLite file, so every server process can poll or cancel a job
+whichever process runs it.
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from typing import Optional, Sequence
+
+from cellular_automata import CellularAutomataFire, StopPredicate
+
+SIMULATION_JOB_DB = 'simulation_jobs.db'
+JOB_POLL_INTERVAL = 0.1  # Seconds between checks while long polling
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    step INTEGER NOT NULL DEFAULT 0,
+    total_steps INTEGER NOT NULL,
+    stats TEXT,
+    error TEXT,
+    stop_reason TEXT,
+    result TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS job_steps (
+    job_id TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    ignited TEXT NOT NULL,
+    burned_out TEXT NOT NULL,
+    PRIMARY KEY (job_id, step)
+);
+"""
+
+JOB_FIELDS = ('id', 'status', 'step', 'total_steps', 'stats', 'error', 'stop_reason',
+              'created_at', 'started_at', 'finished_at', 'pid')
+
+class QueueFullError(Exception):
+    """Raised when no more simulation jobs can be queued"""
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class SimulationJobStore:
+    """Job records in a SQLite file shared by all server processes"""
+
+    def __init__(self, path: str = SIMULATION_JOB_DB):
+        self.path = path
+        self._schema_pid = None
+
+    @contextmanager
+    def _connect(self):
+        # A connection per call: they must not cross fork() or threads
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.execute('PRAGMA synchronous=NORMAL')
+            if self._schema_pid != os.getpid():
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(SCHEMA)
+                self._schema_pid = os.getpid()
+            with conn:
+                yield conn
+
+    def create(self, job_id: str, total_steps: int, stats: dict):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, pid, status, total_steps, stats, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, os.getpid(), JOB_QUEUED, total_steps, json.dumps(stats), time.time())
+            )
+
+    def delete(self, job_ids: Sequence[str]):
+        with self._connect() as conn:
+            conn.executemany('DELETE FROM jobs WHERE id = ?', [(i,) for i in job_ids])
+            conn.executemany('DELETE FROM job_steps WHERE job_id = ?', [(i,) for i in job_ids])
+
+    def start(self, job_id: str) -> bool:
+        """Move from queued to running, unless the job was cancelled first"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                'UPDATE jobs SET status = ?, started_at = ? WHERE id = ? AND status = ?',
+                (JOB_RUNNING, time.time(), job_id, JOB_QUEUED)
+            )
+            return cursor.rowcount == 1
+
+    def progress(self, job_id: str, step: int, stats: dict, ignited: list, burned_out: list) -> bool:
+        """Record one step; returns True if the job has been asked to cancel"""
+        with self._connect() as conn:
+            if step:
+                conn.execute('INSERT OR REPLACE INTO job_steps VALUES (?, ?, ?, ?)',
+                             (job_id, step, json.dumps(ignited), json.dumps(burned_out)))
+            conn.execute('UPDATE jobs SET step = ?, stats = ? WHERE id = ?',
+                         (step, json.dumps(stats), job_id))
+            row = conn.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return row is None or bool(row[0])
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None,
+               stop_reason: Optional[str] = None, result: Optional[dict] = None):
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, stop_reason = ?, result = ?, finished_at = ? WHERE id = ?',
+                (status, error, stop_reason, None if result is None else json.dumps(result),
+                 time.time(), job_id)
+            )
+
+    def cancel(self, job_id: str):
+        """Flag a job to stop; a queued job is cancelled straight away"""
+        with self._connect() as conn:
+            conn.execute('UPDATE jobs SET cancel_requested = 1 WHERE id = ?', (job_id,))
+            conn.execute('UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?',
+                         (JOB_CANCELLED, time.time(), job_id, JOB_QUEUED))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Status and progress, without the result"""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = dict(zip(JOB_FIELDS, row))
+        pid = job.pop('pid')
+        if job['status'] not in FINISHED_STATES and not process_alive(pid):
+            # The process running it exited (worker restart or crash)
+            self.finish(job_id, JOB_FAILED, error='Server process running the job exited')
+            return self.get(job_id)
+
+        job['stats'] = json.loads(job['stats'])
+        progress = 100.0 if job['status'] == JOB_COMPLETED else job['step'] / max(job['total_steps'], 1) * 100
+        job['progress'] = round(progress, 1)
+        return job
+
+    def wait(self, job_id: str, after_step: int, timeout: float) -> Optional[dict]:
+        """Poll until the job is past ``after_step`` or finished, at most ``timeout`` seconds"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['step'] > after_step or job['status'] in FINISHED_STATES:
+                return job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            time.sleep(min(JOB_POLL_INTERVAL, remaining))
+
+    def deltas(self, job_id: str, since: int, until: int) -> dict:
+        """Cells that ignited / burned out in the steps after ``since``, up to ``until``"""
+        since = min(max(since, 0), until)
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT ignited, burned_out FROM job_steps WHERE job_id = ? AND step > ? AND step <= ? ORDER BY step',
+                (job_id, since, until)
+            ).fetchall()
+        return {
+            'since': since,
+            'until': until,
+            'ignited': [json.loads(ignited) for ignited, _ in rows],
+            'burned_out': [json.loads(burned_out) for _, burned_out in rows]
+        }
+
+    def result(self, job_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute('SELECT result FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return None if row is None or row[0] is None else json.loads(row[0])
+
+    def evict(self, max_jobs: int):
+        """Forget the oldest finished jobs beyond max_jobs"""
+        with self._connect() as conn:
+            total = conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+            excess = total - max_jobs
+            if excess <= 0:
+                return
+            placeholders = ', '.join('?' * len(FINISHED_STATES))
+            job_ids = [row[0] for row in conn.execute(
+                f'SELECT id FROM jobs WHERE status IN ({placeholders}) ORDER BY created_at LIMIT ?',
+                (*FINISHED_STATES, excess)
+            )]
+        self.delete(job_ids)
+
+    def status_counts(self) -> dict:
+        with self._connect() as conn:
+            return dict(conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+
+class SimulationJob:
+    """One simulation run, executed by the process that accepted it"""
+
+    def __init__(self, store: SimulationJobStore, sim: CellularAutomataFire, history_format: str = 'frames',
+                 stop_when: Sequence[StopPredicate] = (), isochrone_interval: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.store = store
+        self.sim = sim
+        self.history_format = history_format
+        self.stop_when = stop_when
+        self.isochrone_interval = isochrone_interval
+
+    def run(self):
+        """Step the simulation, publishing progress; runs in a worker thread"""
+        store = self.store
+        if not store.start(self.id):
+            return
+
+        sim = self.sim
+        try:
+            for snapshot in sim.iter_steps(stop_when=self.stop_when, record_history=True):
+                cancelled = store.progress(self.id, snapshot.step, snapshot.stats,
+                                           snapshot.ignited.tolist(), snapshot.burned_out.tolist())
+                if cancelled:
+                    store.finish(self.id, JOB_CANCELLED)
+                    return
+
+            result = sim.get_simulation_data(self.history_format, self.isochrone_interval)
+        except Exception as e:
+            store.finish(self.id, JOB_FAILED, error=str(e))
+            return
+
+        store.finish(self.id, JOB_COMPLETED, stop_reason=sim.stop_reason, result=result)
+
+class SimulationJobQueue:
+    """Bounded queue of simulation jobs served by a pool of worker threads"""
+
+    def __init__(self, workers: int = 2, max_queued: int = 16, max_jobs: int = 64,
+                 db_path: str = SIMULATION_JOB_DB):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_jobs = max_jobs
+        self.store = SimulationJobStore(db_path)
+
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_workers(self):
+        # Started on first use, so each forked server process runs its own pool
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            for i in range(self.workers):
+                threading.Thread(target=self._work, name=f'simulation-job-{i}', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                job.run()
+            finally:
+                self._queue.task_done()
+
+    def submit(self, sim: CellularAutomataFire, history_format: str = 'frames',
+               stop_when: Sequence[StopPredicate] = (),
+               isochrone_interval: Optional[int] = None) -> dict:
+        """Queue a simulation; raises QueueFullError when this process's queue is full"""
+        self._ensure_workers()
+        job = SimulationJob(self.store, sim, history_format, stop_when, isochrone_interval)
+
+        self.store.create(job.id, sim.params.time_steps, sim.get_stats())
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self.store.delete([job.id])
+            raise QueueFullError(f"Simulation queue is full ({self.max_queued} jobs waiting)")
+
+        self.store.evict(self.max_jobs)
+        return self.store.get(job.id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.store.get(job_id)
+
+    def wait(self, job_id: str, after_step: int, timeout: float) -> Optional[dict]:
+        return self.store.wait(job_id, after_step, timeout)
+
+    def deltas(self, job_id: str, since: int, until: int) -> dict:
+        return self.store.deltas(job_id, since, until)
+
+    def result(self, job_id: str) -> Optional[dict]:
+        return self.store.result(job_id)
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """Cancel a job; returns it, or None if it is unknown"""
+        job = self.store.get(job_id)
+        if job is not None and job['status'] not in FINISHED_STATES:
+            self.store.cancel(job_id)
+            job = self.store.get(job_id)
+        return job
+
+    def stats(self) -> dict:
+        counts = self.store.status_counts()
+        return {
+            'workers': self.workers,
+            'queued': counts.get(JOB_QUEUED, 0),
+            'running': counts.get(JOB_RUNNING, 0),
+            'max_queued': self.max_queued,
+            'jobs': sum(counts.values())
+        }
@@ -8,10 +8,13 @@ let heatLayer = null;
 let markerLayer = null;
 let riskLayer = null;
 let fireData = [];
+let moveTimer = null;
+let fireRequest = 0;
 
 // Map configuration
 const ALMORA_CENTER = [29.5971, 79.6591];
 const ALMORA_BOUNDS = [[29.35, 79.35], [29.85, 80.00]];
+const MAX_FIRE_PAGES = 4;  // Pages of /api/historical followed per view
 
 // Map tile providers
 const tileLayers = {
@@ -37,6 +40,7 @@ let currentTileLayer = tileLayers.dark;
 
 document.addEventListener('DOMContentLoaded', () => {
     initMap();
+    updateHeatmap();
     loadFireData();
     loadWeather();
     setupControls();
@@ -88,6 +92,12 @@ function initMap() {
         }
     });
 
+    // Fetch the fires inside the new view once panning / zooming settles
+    map.on('moveend', () => {
+        clearTimeout(moveTimer);
+        moveTimer = setTimeout(loadFireData, 250);
+    });
+
     // Update location info on click
     map.on('click', (e) => {
         document.getElementById('info-lat').textContent = e.latlng.lat.toFixed(4);
@@ -100,16 +110,31 @@ async function loadFireData() {
         const startDate = document.getElementById('date-from')?.value || '2018-01-01';
         const endDate = document.getElementById('date-to')?.value || '2023-12-31';
 
-        const response = await API.get(`/api/historical?start=${startDate}&end=${endDate}`);
+        // Only fires inside the visible area (plus a margin) are fetched
+        const bounds = map.getBounds().pad(0.25);
+        const bbox = [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()]
+            .map(v => v.toFixed(4)).join(',');
+
+        const request = ++fireRequest;
+        const query = `/api/historical?start=${startDate}&end=${endDate}&fire_occurred=1&bbox=${bbox}`;
+
+        // Follow the page cursor, up to MAX_FIRE_PAGES pages
+        let fires = [];
+        let response = null;
+        let cursor = 0;
+        for (let page = 0; page < MAX_FIRE_PAGES && cursor !== null; page++) {
+            response = await API.get(`${query}&cursor=${cursor}`);
+            if (!response.success || request !== fireRequest) return;
+            fires = fires.concat(response.data);
+            cursor = response.next_cursor;
+        }
 
-        if (response.success) {
-            fireData = response.data;
-            document.getElementById('fire-count').textContent =
-                `${response.count} fire incidents recorded`;
+        fireData = fires;
+        document.getElementById('fire-count').textContent = cursor === null
+            ? `${response.total} fire incidents recorded`
+            : `Showing ${fires.length} of ${response.total} fire incidents (zoom in to see all)`;
 
-            updateHeatmap();
-            updateMarkers();
-        }
+        updateMarkers();
     } catch (error) {
         console.error('Failed to load fire data:', error);
         document.getElementById('fire-count').textContent = 'Failed to load data';
@@ -125,24 +150,14 @@ function updateHeatmap() {
     // Check if layer is enabled
     if (!document.getElementById('layer-heatmap')?.checked) return;
 
-    // Prepare heat data
-    const heatData = fireData
-        .filter(d => d.fire_occurred === 1)
-        .map(d => [d.latitude, d.longitude, d.brightness / 500]);
-
-    // Create heat layer
-    heatLayer = L.heatLayer(heatData, {
-        radius: 20,
-        blur: 25,
-        maxZoom: 14,
-        max: 1.0,
-        gradient: {
-            0.2: '#ffff00',
-            0.4: '#ffa500',
-            0.6: '#ff6600',
-            0.8: '#ff3300',
-            1.0: '#ff0000'
-        }
+    // Pre-binned density tiles from the server for the selected dates; only visible tiles are fetched
+    const startDate = document.getElementById('date-from')?.value || '';
+    const endDate = document.getElementById('date-to')?.value || '';
+    heatLayer = L.tileLayer(`/api/tiles/{z}/{x}/{y}?start=${startDate}&end=${endDate}`, {
+        maxNativeZoom: 13,
+        maxZoom: 18,
+        bounds: ALMORA_BOUNDS,
+        opacity: 0.9
     }).addTo(map);
 }
 
@@ -279,7 +294,10 @@ function setupControls() {
     });
 
     // Date filter
-    document.getElementById('apply-filter')?.addEventListener('click', loadFireData);
+    document.getElementById('apply-filter')?.addEventListener('click', () => {
+        loadFireData();
+        updateHeatmap();
+    });
 
     // Map style buttons
     document.querySelectorAll('.style-btn').forEach(btn => {
@@ -11,6 +11,7 @@ let isPlaying = false;
 let playbackSpeed = 1;
 let playbackInterval = null;
 let spreadChart = null;
+let simulationStream = null;
 
 // Cell states
 const UNBURNED = 0;
@@ -134,14 +135,16 @@ function createCellGrid() {
 function updateCellStates(grid) {
     if (!grid || !cellMeshes.length) return;
 
-    const gridSize = grid.length;
+    // Frames are either nested row arrays or flat Uint8Arrays from the stream
+    const isFlat = ArrayBuffer.isView(grid);
+    const gridSize = isFlat ? Math.round(Math.sqrt(grid.length)) : grid.length;
 
     cellMeshes.forEach((mesh, index) => {
         const row = Math.floor(index / gridSize);
         const col = index % gridSize;
 
         if (row < gridSize && col < gridSize) {
-            const state = grid[row][col];
+            const state = isFlat ? grid[index] : grid[row][col];
             mesh.userData.state = state;
 
             // Update color and height based on state
@@ -319,30 +322,70 @@ async function runSimulation() {
     document.getElementById('btn-pause').disabled = false;
     updateStatus('running', 'Running...');
 
-    try {
-        const response = await API.post('/api/simulation', params);
-
-        if (response.success) {
-            simulationData = response.simulation;
-            currentStep = 0;
-
-            document.getElementById('total-steps').textContent = simulationData.history.length;
+    // Frames are appended as steps arrive, playback starts at frame 0
+    simulationData = { history: [], stats_history: [], complete: false };
+    currentStep = 0;
+    let state = null;
 
-            // Start playback
-            isPlaying = true;
-            startPlayback();
-        } else {
-            console.error('Simulation failed:', response.error);
-            updateStatus('error', 'Error');
-        }
+    try {
+        await streamSimulation(params, (event) => {
+            if (event.type === 'header') {
+                state = new Uint8Array(event.shape[0] * event.shape[1]);
+                Object.entries(event.initial).forEach(([cellState, cells]) => {
+                    cells.forEach(i => { state[i] = parseInt(cellState); });
+                });
+                pushFrame(state, event.stats);
+
+                isPlaying = true;
+                startPlayback();
+            } else if (event.type === 'step') {
+                event.burned_out.forEach(i => { state[i] = BURNED; });
+                event.ignited.forEach(i => { state[i] = BURNING; });
+                pushFrame(state, event.stats);
+            } else if (event.type === 'end' && simulationData) {
+                simulationData.complete = true;
+            }
+        });
     } catch (error) {
         console.error('Simulation error:', error);
+        pauseSimulation();
         updateStatus('error', 'Error');
     }
 
+    if (simulationData) simulationData.complete = true;
     document.getElementById('btn-run').disabled = false;
 }
 
+function pushFrame(state, stats) {
+    if (!simulationData) return;  // Reset while streaming
+
+    simulationData.history.push(state.slice());
+    simulationData.stats_history.push(stats);
+    document.getElementById('total-steps').textContent = simulationData.history.length;
+}
+
+function streamSimulation(params, onEvent) {
+    // Server-Sent Events: the server pushes each step as soon as it is computed
+    return new Promise((resolve, reject) => {
+        const source = new EventSource('/api/simulation/events?' + new URLSearchParams(params));
+        const finish = (error) => {
+            // Closing also stops EventSource from reconnecting and rerunning the simulation
+            source.close();
+            simulationStream = null;
+            error ? reject(error) : resolve();
+        };
+        simulationStream = { close: () => finish() };
+
+        source.addEventListener('header', (e) => onEvent(JSON.parse(e.data)));
+        source.addEventListener('step', (e) => onEvent(JSON.parse(e.data)));
+        source.addEventListener('end', (e) => {
+            onEvent(JSON.parse(e.data));
+            finish();
+        });
+        source.onerror = () => finish(new Error('Simulation stream failed'));
+    });
+}
+
 function startPlayback() {
     if (!simulationData) return;
 
@@ -350,6 +393,9 @@ function startPlayback() {
 
     playbackInterval = setInterval(() => {
         if (currentStep >= simulationData.history.length) {
+            // Wait for more frames while the stream is still open
+            if (!simulationData.complete) return;
+
             pauseSimulation();
             updateStatus('completed', 'Complete');
             return;
@@ -383,6 +429,7 @@ function pauseSimulation() {
 }
 
 function resetSimulation() {
+    if (simulationStream) simulationStream.close();
     pauseSimulation();
     currentStep = 0;
     simulationData = null;
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Heatmap Tile Pyramid
+Almora Forest Fire Prediction System
+
+Pre-bins fire brightness into a blurred density grid per zoom level (Web
+Mercator, within the study area) and renders 256px PNG map tiles from it.
+Rendered tiles are cached in memory and on disk, keyed by data version.
+"""
+
+import os
+import io
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+from PIL import Image
+from typing import Dict, Optional
+
+from cache import LRUCache
+
+TILE_SIZE = 256
+TILE_BINS = 64           # Density bins per tile side (4px each)
+MAX_TILE_ZOOM = 13
+BLUR_SIGMA = 1.5         # In bins
+TILE_CACHE_DIR = 'tile_cache'
+
+# Same ramp as the client-side heat layer, with opacity rising with density
+_STOPS = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
+_COLORS = np.array([
+    [255, 255, 0, 0],
+    [255, 255, 0, 140],
+    [255, 165, 0, 180],
+    [255, 102, 0, 200],
+    [255, 51, 0, 215],
+    [255, 0, 0, 230]
+], dtype=float)
+HEAT_LUT = np.stack([np.interp(np.linspace(0, 1, 256), _STOPS, _COLORS[:, c])
+                     for c in range(4)], axis=1).astype(np.uint8)
+
+def lonlat_to_tile(lat, lon, z: int):
+    """Fractional Web Mercator tile coordinates (x, y) at zoom z"""
+    n = 2 ** z
+    lat_rad = np.radians(lat)
+    x = (np.asarray(lon) + 180.0) / 360.0 * n
+    y = (1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * n
+    return x, y
+
+def _encode_png(rgba: np.ndarray) -> bytes:
+    image = Image.fromarray(rgba, 'RGBA')
+    if image.size != (TILE_SIZE, TILE_SIZE):
+        image = image.resize((TILE_SIZE, TILE_SIZE), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+EMPTY_TILE = _encode_png(np.zeros((1, 1, 4), dtype=np.uint8))
+
+class ZoomGrid:
+    """Normalized density grid covering the study area at one zoom level"""
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, weight: np.ndarray,
+                 bounds: dict, z: int):
+        from scipy.ndimage import gaussian_filter  # ~0.3s import, only needed when grids are built
+
+        # Global bin coordinates of the bounds' corners
+        x0, y0 = lonlat_to_tile(bounds['north'], bounds['west'], z)
+        x1, y1 = lonlat_to_tile(bounds['south'], bounds['east'], z)
+        self.bx0, self.by0 = int(x0 * TILE_BINS), int(y0 * TILE_BINS)
+        width = int(x1 * TILE_BINS) - self.bx0 + 1
+        height = int(y1 * TILE_BINS) - self.by0 + 1
+
+        x, y = lonlat_to_tile(lat, lon, z)
+        bx = (x * TILE_BINS).astype(np.int64) - self.bx0
+        by = (y * TILE_BINS).astype(np.int64) - self.by0
+
+        grid = np.bincount(by * width + bx, weights=weight, minlength=width * height)
+        grid = gaussian_filter(grid.reshape(height, width), BLUR_SIGMA, mode='constant')
+
+        peak = grid.max()
+        self.grid = (grid / peak if peak > 0 else grid).astype(np.float32)
+
+    def window(self, x: int, y: int) -> Optional[np.ndarray]:
+        """(TILE_BINS, TILE_BINS) densities for tile (x, y), or None if it is empty"""
+        height, width = self.grid.shape
+        left, top = x * TILE_BINS - self.bx0, y * TILE_BINS - self.by0
+
+        c0, c1 = max(left, 0), min(left + TILE_BINS, width)
+        r0, r1 = max(top, 0), min(top + TILE_BINS, height)
+        if c0 >= c1 or r0 >= r1:
+            return None
+
+        tile = np.zeros((TILE_BINS, TILE_BINS), dtype=np.float32)
+        tile[r0 - top:r1 - top, c0 - left:c1 - left] = self.grid[r0:r1, c0:c1]
+        return tile
+
+class HeatmapTiles:
+    """Fire density tile pyramid with memory and disk tile caches"""
+
+    def __init__(self, lat, lon, weight, bounds: dict, version: str,
+                 max_zoom: int = MAX_TILE_ZOOM, cache_dir: Optional[str] = TILE_CACHE_DIR,
+                 cache_size: int = 1024):
+        lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+        weight = np.asarray(weight, dtype=float)
+        inside = ((lat >= bounds['south']) & (lat <= bounds['north'])
+                  & (lon >= bounds['west']) & (lon <= bounds['east']))
+
+        self.version = version
+        self.max_zoom = max_zoom
+        self.grids: Dict[int, ZoomGrid] = {
+            z: ZoomGrid(lat[inside], lon[inside], weight[inside], bounds, z)
+            for z in range(max_zoom + 1)
+        }
+
+        self.memory = LRUCache(cache_size)
+        self.cache_dir = None
+        if cache_dir:
+            version_key = hashlib.sha1(version.encode()).hexdigest()[:16]
+            self.cache_dir = os.path.join(cache_dir, version_key)
+
+    @classmethod
+    def from_frame(cls, fires: pd.DataFrame, bounds: dict, version: str, **kwargs) -> 'HeatmapTiles':
+        """Tiles weighted by brightness / 500, as in the heatmap endpoint"""
+        return cls(fires['latitude'].to_numpy(), fires['longitude'].to_numpy(),
+                   fires['brightness'].to_numpy() / 500, bounds, version, **kwargs)
+
+    def render(self, z: int, x: int, y: int) -> bytes:
+        """PNG bytes for one tile, without caching"""
+        densities = self.grids[z].window(x, y)
+        if densities is None or not densities.any():
+            return EMPTY_TILE
+        return _encode_png(HEAT_LUT[(densities * 255).astype(np.uint8)])
+
+    def _disk_path(self, z: int, x: int, y: int) -> str:
+        return os.path.join(self.cache_dir, str(z), str(x), f'{y}.png')
+
+    @staticmethod
+    def _write_disk(path: str, data: bytes):
+        # Write then rename, so concurrent readers never see a partial tile
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def tile(self, z: int, x: int, y: int) -> bytes:
+        """PNG bytes for one tile from the memory cache, disk cache or renderer"""
+        key = (z, x, y)
+        data = self.memory.get(key)
+        if data is not None:
+            return data
+
+        path = self._disk_path(z, x, y) if self.cache_dir else None
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+        else:
+            data = self.render(z, x, y)
+            if path and data is not EMPTY_TILE:
+                self._write_disk(path, data)
+
+        self.memory.put(key, data)
+        return data
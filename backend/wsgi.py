@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+WSGI Entry Point
+Almora Forest Fire Prediction System
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Shared data is loaded here, in the gunicorn master when ``preload_app`` is
+on; the model is loaded by each worker in the ``post_fork`` hook, or on its
+first request under servers without that hook.
+"""
+
+from app import create_app
+
+app = create_app(with_model=False)
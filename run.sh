@@ -42,6 +42,12 @@ train_model() {
     python model_trainer.py
 }
 
+# Function to pack satellite images into one memory-mapped cube
+build_cube() {
+    echo -e "${BLUE}Building satellite image cube...${NC}"
+    python satellite_cube.py
+}
+
 # Function to run simulation
 run_simulation() {
     echo -e "${BLUE}Running fire spread simulation...${NC}"
@@ -68,6 +74,9 @@ case "$1" in
     simulate)
         run_simulation
         ;;
+    cube)
+        build_cube
+        ;;
     server)
         start_server
         ;;
@@ -77,11 +86,12 @@ case "$1" in
         start_server
         ;;
     *)
-        echo "Usage: $0 {train|simulate|server|all}"
+        echo "Usage: $0 {train|simulate|cube|server|all}"
         echo ""
         echo "Commands:"
         echo "  train     - Train the CNN-LSTM model"
         echo "  simulate  - Run cellular automata simulation"
+        echo "  cube      - Pack satellite images into a memory-mapped cube"
         echo "  server    - Start the Flask web server"
         echo "  all       - Run training, simulation, and start server"
         echo ""